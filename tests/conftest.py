@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,17 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def inline_background_work(settings):
+    # Общая in-memory база SQLite не ждёт блокировок, поэтому фоновые
+    # воркеры и писатель очереди комментариев в тестах не запускаются.
+    settings.THUMBNAIL_WORKERS = 0
+    settings.COMMENT_QUEUE_WRITER = False
+
+
+@pytest.fixture(autouse=True)
+def isolated_request_metrics(settings, tmp_path):
+    # Метрики запросов не должны попасть в каталог рабочего сайта.
+    settings.REQUEST_METRICS_DIR = str(tmp_path / 'metrics')
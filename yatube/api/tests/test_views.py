@@ -0,0 +1,138 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+from posts.tests.utils import run_on_commit
+
+POSTS_COUNT = 13
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(
+            username='Author', first_name='Иван', last_name='Иванов'
+        )
+        cls.reader = User.objects.create(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for number in range(POSTS_COUNT):
+            cls.post = Post.objects.create(
+                author=cls.author, text=f'Пост {number}', group=cls.group
+            )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def walk(self, url, client=None):
+        """Проходит ленту по курсорам и собирает тексты постов."""
+        texts = []
+        params = {}
+        while True:
+            data = (client or self.client).get(url, params).json()
+            texts += [post['text'] for post in data['results']]
+            if not data['next']:
+                return texts
+            params = {'cursor': data['next']}
+
+    def test_feeds_walk_all_posts(self):
+        """Ленты API отдают все посты от новых к старым"""
+        expected = [f'Пост {n}' for n in range(POSTS_COUNT - 1, -1, -1)]
+        for url in (
+            reverse('api:index'),
+            reverse('api:group_list', args=(self.group.slug,)),
+            reverse('api:profile', args=(self.author.username,)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.walk(url), expected)
+        self.assertEqual(
+            self.walk(reverse('api:follow_index'), self.reader_client),
+            expected,
+        )
+
+    def test_post_serialization(self):
+        """Пост сериализуется компактно, с автором и группой"""
+        data = self.client.get(
+            reverse('api:post_detail', args=(self.post.pk,))
+        ).json()
+        self.assertEqual(data['post']['text'], self.post.text)
+        self.assertEqual(data['post']['author'], 'Author')
+        self.assertEqual(data['post']['group'], 'group')
+        self.assertIsNone(data['post']['image'])
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']['results']],
+            ['Комментарий'],
+        )
+
+    def test_profile_and_group_details(self):
+        """Профиль и группа отдают свои сведения"""
+        data = self.client.get(
+            reverse('api:profile', args=(self.author.username,))
+        ).json()
+        self.assertEqual(data['author'], {
+            'username': 'Author', 'first_name': 'Иван',
+            'last_name': 'Иванов', 'posts_count': POSTS_COUNT,
+        })
+        data = self.client.get(
+            reverse('api:group_list', args=(self.group.slug,))
+        ).json()
+        self.assertEqual(data['group']['title'], 'Группа')
+
+    def test_missing_objects_return_404(self):
+        """Несуществующие объекты дают JSON с кодом 404"""
+        for url in (
+            reverse('api:group_list', args=('missing',)),
+            reverse('api:profile', args=('missing',)),
+            reverse('api:post_detail', args=(0,)),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('detail', response.json())
+
+    def test_follow_feed_requires_login(self):
+        """Лента подписок без входа отвечает 401"""
+        response = self.client.get(reverse('api:follow_index'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_etag_revalidation(self):
+        """Неизменившаяся лента отвечает 304, новый пост меняет ETag"""
+        url = reverse('api:index')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        with run_on_commit():
+            Post.objects.create(author=self.author, text='Новый пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_query_budget(self):
+        """Страница ленты — одна выборка"""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:index'))
+
+    def test_mutual_and_suggestions(self):
+        """Взаимные подписки и рекомендации в API"""
+        Follow.objects.create(user=self.author, author=self.reader)
+        other = User.objects.create(username='Other')
+        Follow.objects.create(user=self.author, author=other)
+        data = self.client.get(
+            reverse('api:mutual_follows', args=(self.reader.username,))
+        ).json()
+        self.assertEqual(
+            [user['username'] for user in data['results']], ['Author']
+        )
+        data = self.reader_client.get(
+            reverse('api:follow_suggestions')
+        ).json()
+        self.assertEqual(
+            [user['username'] for user in data['results']], ['Other']
+        )
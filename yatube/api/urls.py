@@ -0,0 +1,17 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.index, name='index'),
+    path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('profile/<str:username>/', views.profile, name='profile'),
+    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('follow/', views.follow_index, name='follow_index'),
+    path('profile/<str:username>/mutual/', views.mutual_follows,
+         name='mutual_follows'),
+    path('follow/suggestions/', views.follow_suggestions,
+         name='follow_suggestions'),
+]
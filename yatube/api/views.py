@@ -0,0 +1,179 @@
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_safe
+
+from posts import conditional, feeds, follow_graph
+from posts.models import Comment, Group, Post, User
+from posts.paginators import COMMENT_ORDERINGS, FEED_ORDERING, CursorPaginator
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'updated', 'image', 'author__username',
+    'group__slug',
+)
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def _response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def _not_found():
+    return _response({'detail': 'Не найдено'}, status=404)
+
+
+def _login_required(view):
+    """Вместо перенаправления на форму входа отвечает 401."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _response({'detail': 'Требуется вход'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _users(user_ids):
+    """Пользователи в порядке ``user_ids``."""
+    rows = User.objects.filter(pk__in=user_ids).values(
+        'id', 'username', 'first_name', 'last_name'
+    )
+    by_id = {row.pop('id'): row for row in rows}
+    return [by_id[user_id] for user_id in user_ids if user_id in by_id]
+
+
+def _post(row):
+    """Пост из строки values() без создания экземпляра модели."""
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'updated': row['updated'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'image': default_storage.url(row['image']) if row['image'] else None,
+    }
+
+
+def _comment(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': row['author__username'],
+    }
+
+
+def _page(request, queryset, serialize, per_page, ordering=FEED_ORDERING):
+    """Страница по курсору и курсоры соседних страниц."""
+    paginator = CursorPaginator(queryset, per_page, ordering=ordering)
+    page = paginator.page(request.GET.get('cursor'))
+    return {
+        'results': [serialize(row) for row in page],
+        'next': paginator.next_cursor,
+        'previous': paginator.previous_cursor,
+    }
+
+
+def _posts(request, queryset):
+    return _page(
+        request, queryset.values(*POST_FIELDS), _post, settings.POSTS_AMOUNT
+    )
+
+
+@require_safe
+@condition(etag_func=conditional.index_etag)
+def index(request):
+    return _response(_posts(request, Post.objects.all()))
+
+
+@require_safe
+@condition(etag_func=conditional.group_etag)
+def group_posts(request, slug):
+    group = Group.objects.filter(slug=slug).values(
+        'slug', 'title', 'description'
+    ).first()
+    if group is None:
+        return _not_found()
+    return _response({
+        'group': group,
+        **_posts(request, Post.objects.filter(group__slug=slug)),
+    })
+
+
+@require_safe
+@condition(etag_func=conditional.profile_etag)
+def profile(request, username):
+    author = User.objects.filter(username=username).values(
+        'username', 'first_name', 'last_name', 'stats__posts_count'
+    ).first()
+    if author is None:
+        return _not_found()
+    author['posts_count'] = author.pop('stats__posts_count')
+    return _response({
+        'author': author,
+        **_posts(request, Post.objects.filter(author__username=username)),
+    })
+
+
+@require_safe
+@condition(etag_func=conditional.post_etag)
+def post_detail(request, post_id):
+    post = Post.objects.filter(pk=post_id).values(*POST_FIELDS).first()
+    if post is None:
+        return _not_found()
+    order = request.GET.get('order')
+    if order not in COMMENT_ORDERINGS:
+        order = 'oldest'
+    comments = Comment.objects.filter(post_id=post_id).values(
+        *COMMENT_FIELDS
+    )
+    return _response({
+        'post': _post(post),
+        'comments': _page(
+            request, comments, _comment, settings.COMMENTS_AMOUNT,
+            ordering=COMMENT_ORDERINGS[order],
+        ),
+    })
+
+
+@require_safe
+@_login_required
+@condition(etag_func=conditional.follow_etag)
+def follow_index(request):
+    paginator = CursorPaginator(
+        feeds.entries(request.user), settings.POSTS_AMOUNT,
+        ordering=feeds.ENTRY_ORDERING,
+    )
+    page = paginator.page(request.GET.get('cursor'))
+    post_ids = [entry['post_id'] for entry in page]
+    rows = {
+        row['id']: row
+        for row in Post.objects.filter(pk__in=post_ids).values(*POST_FIELDS)
+    }
+    return _response({
+        'results': [
+            _post(rows[post_id]) for post_id in post_ids if post_id in rows
+        ],
+        'next': paginator.next_cursor,
+        'previous': paginator.previous_cursor,
+    })
+
+
+@require_safe
+def mutual_follows(request, username):
+    user_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if user_id is None:
+        return _not_found()
+    return _response({'results': _users(follow_graph.mutual(user_id))})
+
+
+@require_safe
+@_login_required
+def follow_suggestions(request):
+    return _response({'results': _users(follow_graph.suggestions(
+        request.user.pk, settings.FOLLOW_SUGGESTIONS
+    ))})
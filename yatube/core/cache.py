@@ -0,0 +1,164 @@
+import fcntl
+import hashlib
+import math
+import os
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+VERSION_KEY = 'version:{}'
+LOCK_KEY = 'lock:{}'
+# Файловые блокировки раскладываются по ограниченному числу файлов.
+FILE_LOCKS = 256
+LOCK_POLL = 0.05
+
+
+def version(name):
+    """Текущее поколение закэшированных данных пространства ``name``.
+
+    Поколение входит в ключи, поэтому его смена разом делает устаревшими
+    все записи пространства. Начальное значение берётся из часов, чтобы
+    после вытеснения ключа не вернуться к одному из прошлых поколений.
+    """
+    key = VERSION_KEY.format(name)
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, int(time.time() * 1000), None)
+        current = cache.get(key)
+    return current
+
+
+def bump(name):
+    """Переводит пространство ``name`` в новое поколение."""
+    try:
+        cache.incr(VERSION_KEY.format(name))
+    except ValueError:
+        version(name)
+
+
+def make_key(name, *parts):
+    """Ключ записи пространства ``name`` в его текущем поколении."""
+    digest = hashlib.md5(
+        ':'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+    return f'{name}:{version(name)}:{digest}'
+
+
+def page_namespace(view_name, **kwargs):
+    """Пространство закэшированных страниц представления.
+
+    Без ``kwargs`` — все страницы представления, с ними — страницы одного
+    объекта, например профиля с данным ``username``.
+    """
+    parts = [f'{name}={value}' for name, value in sorted(kwargs.items())]
+    return ':'.join(['page', view_name, *parts])
+
+
+def purge_pages(view_name, **kwargs):
+    """Сбрасывает закэшированные страницы представления или объекта."""
+    bump(page_namespace(view_name, **kwargs))
+
+
+class CacheLock:
+    """Блокировка через атомарный ``cache.add`` (Redis, locmem)."""
+
+    def __init__(self, key):
+        self.key = LOCK_KEY.format(key)
+        self.token = uuid.uuid4().hex
+
+    def try_acquire(self):
+        return cache.add(self.key, self.token, settings.CACHE_LOCK_TIMEOUT)
+
+    def release(self):
+        if cache.get(self.key) == self.token:
+            cache.delete(self.key)
+
+
+class FileLock:
+    """Блокировка flock в ``CACHE_LOCK_DIR`` для файлового кэша.
+
+    ``add`` файлового кэша не атомарен, а flock снимается сам, если
+    процесс упал, не дойдя до ``release``.
+    """
+
+    def __init__(self, key):
+        number = int(hashlib.md5(key.encode()).hexdigest(), 16) % FILE_LOCKS
+        os.makedirs(settings.CACHE_LOCK_DIR, exist_ok=True)
+        self.path = os.path.join(settings.CACHE_LOCK_DIR, f'{number}.lock')
+        self.fd = None
+
+    def try_acquire(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self.fd = fd
+        return True
+
+    def release(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+def lock(key):
+    if isinstance(caches['default'], FileBasedCache):
+        return FileLock(key)
+    return CacheLock(key)
+
+
+def _fresh(entry, beta):
+    """Не пора ли пересчитать запись заранее (алгоритм XFetch).
+
+    Чем дольше считается значение и чем ближе срок, тем вероятнее, что
+    запрос возьмётся за пересчёт до истечения записи.
+    """
+    value, expires, delta = entry
+    return time.time() - delta * beta * math.log(1 - random.random()) \
+        < expires
+
+
+def get_or_compute(key, compute, timeout, beta=1.0):
+    """Значение из кэша или результат ``compute()``, сохранённый в кэш.
+
+    Пересчитывает запись один процесс, взявший блокировку; остальные
+    тем временем отдают прежнее значение, которое хранится ещё
+    ``CACHE_STALE_GRACE`` секунд после срока. Если прежнего значения
+    нет, они ждут пересчёта не дольше ``CACHE_LOCK_TIMEOUT``.
+    """
+    entry = cache.get(key)
+    if entry is not None and _fresh(entry, beta):
+        return entry[0]
+    guard = lock(key)
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+    while not guard.try_acquire():
+        if entry is not None:
+            return entry[0]
+        if time.monotonic() >= deadline:
+            return compute()
+        time.sleep(LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    try:
+        if entry is None:
+            # Пока ждали блокировку, значение мог посчитать другой.
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        started = time.time()
+        value = compute()
+        finished = time.time()
+        cache.set(
+            key, (value, finished + timeout, finished - started),
+            timeout + settings.CACHE_STALE_GRACE,
+        )
+        return value
+    finally:
+        guard.release()
@@ -0,0 +1,54 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает запросы в секунду гостевых страниц с кэшем '
+            'целых страниц и без него')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        post = Post.objects.select_related('author', 'group').order_by(
+            '-pub_date').first()
+        if post is None:
+            raise CommandError('База пуста: выполните seed_yatube')
+        urls = {
+            'index': reverse('posts:index'),
+            'profile': reverse('posts:profile', args=(post.author,)),
+            'post_detail': reverse('posts:post_detail', args=(post.pk,)),
+            'about': reverse('about:author'),
+        }
+        if post.group:
+            urls['group_posts'] = reverse(
+                'posts:group_list', args=(post.group.slug,)
+            )
+        self.stdout.write(
+            f'{"страница":<14}{"без кэша, з/с":>16}{"с кэшем, з/с":>16}'
+        )
+        for name, url in urls.items():
+            with override_settings(PAGE_CACHE_TIMEOUT=0):
+                uncached = self.throughput(url, options['requests'])
+            cached = self.throughput(url, options['requests'])
+            self.stdout.write(f'{name:<14}{uncached:>16.1f}{cached:>16.1f}')
+
+    def throughput(self, url, requests):
+        """Запросы в секунду гостя после одного прогревочного запроса."""
+        cache.clear()
+        client = Client()
+        client.get(url)
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{url} ответил кодом {response.status_code}'
+                )
+        return requests / (time.perf_counter() - started)
@@ -0,0 +1,149 @@
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import (OperationalError, close_old_connections, connection,
+                       transaction)
+
+from posts.models import Comment, Post, User
+
+PROFILES = ('off', 'on')
+
+
+class Command(BaseCommand):
+    help = ('Смешанная нагрузка чтения и записи на копии базы SQLite '
+            'в нескольких процессах: с профилем SQLITE_PRAGMAS и без него')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument(
+            '--startup', type=float, default=3,
+            help='Сколько секунд дать процессам на запуск Django',
+        )
+        parser.add_argument(
+            '--profile', choices=PROFILES,
+            help='Прогнать только один вариант',
+        )
+        # Служебные параметры процесса-нагрузчика.
+        parser.add_argument('--worker', choices=('read', 'write'))
+        parser.add_argument('--database')
+        parser.add_argument('--start-at', type=float)
+
+    def handle(self, *args, **options):
+        if options['worker']:
+            return self.work(options)
+        if connection.vendor != 'sqlite':
+            raise CommandError('Бенчмарк рассчитан только на SQLite')
+        if not settings.SQLITE_PRAGMAS:
+            raise CommandError(
+                'SQLITE_PRAGMAS пуст: сравнивать не с чем '
+                '(YATUBE_SQLITE_TUNING=0?)'
+            )
+        if not Post.objects.exists():
+            raise CommandError('База пуста: выполните seed_yatube')
+        header = f'{"профиль":<10}{"чтений/с":>12}{"записей/с":>12}' \
+                 f'{"блокировок":>12}'
+        self.stdout.write(header)
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in [options['profile']] if options['profile'] \
+                    else PROFILES:
+                path = os.path.join(directory, f'{profile}.sqlite3')
+                self.copy_database(path, profile)
+                reads, writes, locked = self.run(path, profile, options)
+                self.stdout.write(
+                    f'{profile:<10}{reads / options["seconds"]:>12.1f}'
+                    f'{writes / options["seconds"]:>12.1f}{locked:>12}'
+                )
+
+    def copy_database(self, path, profile):
+        """Копирует текущую базу; без профиля — с обычным журналом."""
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+            journal_mode = 'wal' if profile == 'on' else 'delete'
+            target.execute(f'PRAGMA journal_mode = {journal_mode}')
+        finally:
+            target.close()
+
+    def run(self, path, profile, options):
+        start_at = time.time() + options['startup']
+        command = [
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'),
+            'bench_sqlite', '--database', path, '--profile', profile,
+            '--seconds', str(options['seconds']),
+            '--start-at', str(start_at),
+        ]
+        workers = [
+            subprocess.Popen(
+                command + ['--worker', kind],
+                stdout=subprocess.PIPE,
+                universal_newlines=True,
+            )
+            for kind in ['read'] * options['readers']
+            + ['write'] * options['writers']
+        ]
+        reads = writes = locked = 0
+        for worker in workers:
+            output, _ = worker.communicate()
+            if worker.returncode:
+                raise CommandError('Процесс нагрузки завершился с ошибкой')
+            result = json.loads(output.strip().splitlines()[-1])
+            reads += result['read']
+            writes += result['write']
+            locked += result['locked']
+        return reads, writes, locked
+
+    def work(self, options):
+        """Крутит один вид операций и печатает итог строкой JSON.
+
+        После каждой операции соединение обрабатывается так же, как в
+        конце запроса: без профиля оно закрывается.
+        """
+        database = connection.settings_dict
+        database['NAME'] = options['database']
+        if options['profile'] == 'off':
+            database['CONN_MAX_AGE'] = 0
+            settings.SQLITE_PRAGMAS = {}
+        post_ids = list(Post.objects.order_by('-pk').values_list(
+            'pk', flat=True)[:1000])
+        user_ids = list(User.objects.order_by('-pk').values_list(
+            'pk', flat=True)[:1000])
+        close_old_connections()
+        operation = self.read if options['worker'] == 'read' else self.write
+        done = locked = 0
+        time.sleep(max(options['start_at'] - time.time(), 0))
+        deadline = time.monotonic() + options['seconds']
+        while time.monotonic() < deadline:
+            try:
+                operation(random.choice(post_ids), random.choice(user_ids))
+                done += 1
+            except OperationalError:
+                locked += 1
+            finally:
+                close_old_connections()
+        self.stdout.write(json.dumps({
+            'read': done if options['worker'] == 'read' else 0,
+            'write': done if options['worker'] == 'write' else 0,
+            'locked': locked,
+        }))
+
+    def read(self, post_id, user_id):
+        list(Post.objects.select_related('author', 'group')[:10])
+        list(Comment.objects.filter(post_id=post_id).select_related(
+            'author')[:20])
+
+    def write(self, post_id, user_id):
+        with transaction.atomic():
+            Comment.objects.create(
+                post_id=post_id, author_id=user_id, text='Нагрузочный тест'
+            )
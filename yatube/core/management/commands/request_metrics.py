@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import metrics
+
+SORT_KEYS = {
+    'requests': lambda row: row['requests'],
+    'total': lambda row: row['total']['p95'],
+    'sql': lambda row: row['sql']['mean'],
+    'queries': lambda row: row['queries']['mean'],
+}
+
+
+class Command(BaseCommand):
+    help = ('Выводит сводку метрик запросов по представлениям '
+            'за скользящее окно всех процессов')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort', choices=sorted(SORT_KEYS), default='total',
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести полные гистограммы в JSON',
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Удалить накопленные метрики',
+        )
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            metrics.reset()
+            self.stdout.write('Метрики сброшены')
+            return
+        summary = metrics.summary(metrics.collect())
+        if options['json']:
+            self.stdout.write(
+                json.dumps(summary, ensure_ascii=False, indent=2)
+            )
+            return
+        if not summary:
+            self.stdout.write('Метрик пока нет')
+            return
+        self.stdout.write(
+            f'{"представление":<28}{"запросов":>9}{"p50, мс":>9}'
+            f'{"p95, мс":>9}{"SQL":>6}{"SQL, мс":>9}{"шабл., мс":>10}'
+            f'{"кэш":>7}'
+        )
+        rows = sorted(
+            summary.items(),
+            key=lambda item: SORT_KEYS[options['sort']](item[1]),
+            reverse=True,
+        )
+        for view, row in rows:
+            ratio = row['cache_hit_ratio']
+            self.stdout.write(
+                f'{view:<28}{row["requests"]:>9}'
+                f'{row["total"]["p50"]:>9.1f}{row["total"]["p95"]:>9.1f}'
+                f'{row["queries"]["mean"]:>6.1f}{row["sql"]["mean"]:>9.1f}'
+                f'{row["template"]["mean"]:>10.1f}'
+                f'{"—" if ratio is None else f"{ratio:.0%}":>7}'
+            )
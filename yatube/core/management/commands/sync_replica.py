@@ -0,0 +1,39 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик онлайн-бэкапом; '
+            'для локальной проверки чтения с реплик')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Какие реплики обновить (по умолчанию все из READ_REPLICAS)',
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.READ_REPLICAS
+        if not aliases:
+            raise CommandError(
+                'Реплики не заданы: укажите пути в переменной YATUBE_REPLICAS'
+            )
+        primary = connections['default']
+        for alias in aliases:
+            if alias not in settings.READ_REPLICAS:
+                raise CommandError(f'{alias} не входит в READ_REPLICAS')
+            replica = connections[alias]
+            if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+                raise CommandError('Копировать можно только базы SQLite')
+            replica.close()
+            source = sqlite3.connect(primary.settings_dict['NAME'])
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                source.backup(target)
+            finally:
+                source.close()
+                target.close()
+            self.stdout.write(f'{alias}: скопировано из основной базы')
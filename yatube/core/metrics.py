@@ -0,0 +1,303 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.template.backends.django import DjangoTemplates, Template
+
+# Верхние границы корзин гистограмм; последняя корзина — всё, что больше.
+BOUNDS = {
+    'total': (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+    'sql': (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+    'template': (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+    'queries': (0, 1, 2, 3, 5, 10, 20, 50, 100),
+}
+PERCENTILES = (0.5, 0.95, 0.99)
+
+_local = threading.local()
+_MISSING = object()
+
+
+class RequestMetrics:
+    """Счётчики одного запроса; живут в потоке, который его обслуживает."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql = 0.0
+        self.template = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка для ``connection.execute_wrapper``."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += (time.perf_counter() - started) * 1000
+            self.queries += 1
+
+    @property
+    def total(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, total):
+        return ', '.join((
+            f'sql;dur={self.sql:.2f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template:.2f}',
+            f'cache;desc="{self.cache_hits} hits, '
+            f'{self.cache_misses} misses"',
+            f'total;dur={total:.2f}',
+        ))
+
+
+def current():
+    return getattr(_local, 'metrics', None)
+
+
+def start():
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def stop():
+    _local.metrics = None
+
+
+def _empty_view():
+    return {
+        'requests': 0,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'histograms': {
+            name: {
+                'counts': [0] * (len(bounds) + 1), 'sum': 0, 'max': 0,
+            }
+            for name, bounds in BOUNDS.items()
+        },
+    }
+
+
+def _merge_view(target, source):
+    for key in ('requests', 'cache_hits', 'cache_misses'):
+        target[key] += source[key]
+    for name, histogram in source['histograms'].items():
+        merged = target['histograms'][name]
+        merged['counts'] = [
+            left + right
+            for left, right in zip(merged['counts'], histogram['counts'])
+        ]
+        merged['sum'] += histogram['sum']
+        merged['max'] = max(merged['max'], histogram['max'])
+
+
+class Registry:
+    """Гистограммы по представлениям в скользящем окне из минутных корзин.
+
+    Каждый процесс копит свои корзины и время от времени сбрасывает их
+    в файл ``REQUEST_METRICS_DIR/<pid>.json``; команда ``request_metrics``
+    и страница ``/admin/metrics/`` складывают файлы всех процессов.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.minutes = {}
+        self.flushed = time.monotonic()
+
+    def record(self, view, metrics, total):
+        minute = int(time.time() // 60)
+        values = {
+            'total': total,
+            'sql': metrics.sql,
+            'template': metrics.template,
+            'queries': metrics.queries,
+        }
+        with self.lock:
+            views = self.minutes.setdefault(minute, {})
+            stored = views.setdefault(view, _empty_view())
+            stored['requests'] += 1
+            stored['cache_hits'] += metrics.cache_hits
+            stored['cache_misses'] += metrics.cache_misses
+            for name, value in values.items():
+                histogram = stored['histograms'][name]
+                histogram['counts'][bisect_left(BOUNDS[name], value)] += 1
+                histogram['sum'] += value
+                histogram['max'] = max(histogram['max'], value)
+            self._prune(minute)
+        interval = settings.REQUEST_METRICS_FLUSH_INTERVAL
+        if time.monotonic() - self.flushed >= interval:
+            self.flush()
+
+    def _prune(self, minute):
+        oldest = minute - settings.REQUEST_METRICS_WINDOW + 1
+        for stale in [key for key in self.minutes if key < oldest]:
+            del self.minutes[stale]
+
+    def flush(self):
+        """Атомарно записывает корзины процесса в его файл."""
+        with self.lock:
+            self._prune(int(time.time() // 60))
+            snapshot = json.dumps(self.minutes)
+            self.flushed = time.monotonic()
+        directory = settings.REQUEST_METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w') as snapshot_file:
+            snapshot_file.write(snapshot)
+        os.replace(f'{path}.tmp', path)
+
+    def clear(self):
+        with self.lock:
+            self.minutes = {}
+
+
+registry = Registry()
+
+
+def collect():
+    """Складывает окна всех процессов в одну гистограмму на представление.
+
+    Файлы процессов, не писавших дольше окна, удаляются.
+    """
+    directory = settings.REQUEST_METRICS_DIR
+    horizon = time.time() - settings.REQUEST_METRICS_WINDOW * 60
+    oldest = int(horizon // 60) + 1
+    views = {}
+    if not os.path.isdir(directory):
+        return views
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if not name.endswith('.json'):
+            continue
+        try:
+            if os.path.getmtime(path) < horizon:
+                os.remove(path)
+                continue
+            with open(path) as snapshot_file:
+                minutes = json.load(snapshot_file)
+        except (OSError, ValueError):
+            continue
+        for minute, minute_views in minutes.items():
+            if int(minute) < oldest:
+                continue
+            for view, data in minute_views.items():
+                _merge_view(views.setdefault(view, _empty_view()), data)
+    return views
+
+
+def reset():
+    registry.clear()
+    directory = settings.REQUEST_METRICS_DIR
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+
+
+def percentile(histogram, bounds, fraction):
+    """Оценка перцентиля сверху — граница корзины, куда он попал."""
+    total = sum(histogram['counts'])
+    if not total:
+        return 0
+    seen = 0
+    for index, count in enumerate(histogram['counts']):
+        seen += count
+        if seen >= fraction * total:
+            if index < len(bounds):
+                return round(min(bounds[index], histogram['max']), 2)
+            break
+    return round(histogram['max'], 2)
+
+
+def summary(views):
+    """Перцентили, средние и доля попаданий в кэш по представлениям."""
+    result = {}
+    for view, data in views.items():
+        requests = data['requests'] or 1
+        lookups = data['cache_hits'] + data['cache_misses']
+        result[view] = {
+            'requests': data['requests'],
+            'cache_hits': data['cache_hits'],
+            'cache_misses': data['cache_misses'],
+            'cache_hit_ratio': (
+                round(data['cache_hits'] / lookups, 3) if lookups else None
+            ),
+        }
+        for name, histogram in data['histograms'].items():
+            stats = {
+                f'p{int(fraction * 100)}': percentile(
+                    histogram, BOUNDS[name], fraction
+                )
+                for fraction in PERCENTILES
+            }
+            stats['mean'] = round(histogram['sum'] / requests, 2)
+            stats['max'] = round(histogram['max'], 2)
+            stats['buckets'] = dict(zip(
+                [str(bound) for bound in BOUNDS[name]] + ['inf'],
+                histogram['counts'],
+            ))
+            result[view][name] = stats
+    return result
+
+
+class TimedTemplate(Template):
+    """Шаблон, чей рендер учитывается в метриках текущего запроса."""
+
+    def render(self, context=None, request=None):
+        metrics = current()
+        if metrics is None:
+            return super().render(context, request)
+        # Вложенные render_to_string не должны учитываться дважды.
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template += (time.perf_counter() - started) * 1000
+
+
+class TimedTemplates(DjangoTemplates):
+    """Бэкенд шаблонов Django, отдающий ``TimedTemplate``."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(
+            super().from_string(template_code).template, self
+        )
+
+    def get_template(self, template_name):
+        return TimedTemplate(
+            super().get_template(template_name).template, self
+        )
+
+
+class CountedCacheMixin:
+    """Считает попадания и промахи чтений кэша в метриках запроса.
+
+    ``get_many`` у встроенных бэкендов сводится к ``get``, поэтому
+    отдельно не учитывается.
+    """
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        metrics = current()
+        if metrics is not None:
+            if value is _MISSING:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _MISSING else value
+
+
+class CountedFileBasedCache(CountedCacheMixin, FileBasedCache):
+    pass
+
+
+class CountedLocMemCache(CountedCacheMixin, LocMemCache):
+    pass
@@ -0,0 +1,137 @@
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from . import cache, metrics, replicas
+
+
+class RequestMetricsMiddleware:
+    """Считает SQL, время шаблонов и обращения к кэшу для каждого запроса.
+
+    Итоги уходят в заголовок ``Server-Timing`` и в скользящие гистограммы
+    по имени представления.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collected = metrics.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(collected)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.stop()
+        total = collected.total
+        response['Server-Timing'] = collected.server_timing(total)
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        metrics.registry.record(view, collected, total)
+        return response
+
+
+class ReplicaMiddleware:
+    """Отправляет чтения ленточных страниц на реплики.
+
+    Страницы перечислены в ``REPLICA_VIEWS``. После успешного запроса,
+    который что-то записал (пост, комментарий, вход, регистрация),
+    пользователь на ``REPLICA_PIN_SECONDS`` закрепляется за основной базой
+    cookie, чтобы не увидеть на реплике состояние до своей правки.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas.begin()
+        try:
+            response = self.get_response(request)
+            wrote = replicas.wrote()
+        finally:
+            replicas.begin()
+        if (settings.READ_REPLICAS and wrote
+                and response.status_code < 400):
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.resolver_match.view_name in settings.REPLICA_VIEWS
+                and request.method in ('GET', 'HEAD')
+                and settings.REPLICA_PIN_COOKIE not in request.COOKIES):
+            replicas.use_replica()
+
+
+class AnonymousPageCacheMiddleware:
+    """Отдаёт гостям публичные страницы целиком из кэша.
+
+    Кэшируются только представления из ``PAGE_CACHE_VIEWS``, запросы без
+    cookie из ``PAGE_CACHE_BYPASS_COOKIES`` и ответы 200, которые не
+    ставят cookie и не выдают CSRF-токен. Попадание обходит сессии,
+    аутентификацию и шаблоны. В ключ входят поколения страниц
+    представления и объекта, их сбрасывает ``core.cache.purge_pages``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = self.cache_key(request)
+        if key is None:
+            return self.get_response(request)
+        response = default_cache.get(key)
+        if response is not None:
+            return get_conditional_response(
+                request,
+                etag=response.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    response.get('Last-Modified', '')
+                ),
+                response=response,
+            )
+        response = self.get_response(request)
+        if self.is_cacheable(request, response):
+            default_cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+    def cache_key(self, request):
+        if (settings.PAGE_CACHE_TIMEOUT <= 0
+                or request.method not in ('GET', 'HEAD')
+                or any(name in request.COOKIES
+                       for name in settings.PAGE_CACHE_BYPASS_COOKIES)):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if match.view_name not in settings.PAGE_CACHE_VIEWS:
+            return None
+        request.resolver_match = match
+        return cache.make_key(
+            'page', request.method, request.get_full_path(),
+            cache.version(cache.page_namespace(match.view_name)),
+            cache.version(
+                cache.page_namespace(match.view_name, **match.kwargs)
+            ),
+        )
+
+    def is_cacheable(self, request, response):
+        user = getattr(request, 'user', None)
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED')
+            and not (user and user.is_authenticated)
+        )
@@ -0,0 +1,65 @@
+import random
+import threading
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+_local = threading.local()
+
+
+def read_alias():
+    """База для чтения в текущем запросе; None — основная."""
+    return getattr(_local, 'alias', None)
+
+
+def use_replica():
+    """Направляет чтения запроса на случайную реплику, если они заданы."""
+    if settings.READ_REPLICAS:
+        _local.alias = random.choice(settings.READ_REPLICAS)
+
+
+def use_primary():
+    """До конца запроса читать с основной базы, например после записи."""
+    _local.alias = None
+
+
+def begin():
+    """Начинает запрос: чтения с основной базы, записей ещё не было."""
+    _local.alias = None
+    _local.wrote = False
+
+
+def wrote():
+    """Писал ли текущий запрос в базу."""
+    return getattr(_local, 'wrote', False)
+
+
+class ReplicaRouter:
+    """Читает с реплики только там, где запрос разрешил это явно.
+
+    Реплику для запроса выбирает ReplicaMiddleware, и на неё уходят
+    только модели приложений из ``REPLICA_APPS``: сессии и пользователи
+    всегда читаются с основной базы. Первая же запись возвращает остаток
+    запроса на основную базу, чтобы прочитать записанное.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in settings.REPLICA_APPS:
+            return read_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        use_primary()
+        _local.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.READ_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными от основной базы.
+        return db not in settings.READ_REPLICAS
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Настраивает новое соединение SQLite по SQLITE_PRAGMAS.
+
+    journal_mode идёт первым: WAL хранится в файле базы, остальные
+    прагмы действуют только на это соединение. Базы в памяти WAL не
+    поддерживают и не настраиваются.
+    """
+    if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+        return
+    pragmas = sorted(
+        settings.SQLITE_PRAGMAS.items(),
+        key=lambda item: item[0] != 'journal_mode',
+    )
+    for name, value in pragmas:
+        connection.connection.execute(f'PRAGMA {name} = {value}')
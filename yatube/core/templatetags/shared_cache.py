@@ -0,0 +1,55 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from core import cache
+
+register = template.Library()
+
+
+class SharedCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        try:
+            timeout = int(self.timeout.resolve(context))
+        except (ValueError, TypeError):
+            raise template.TemplateSyntaxError(
+                f'sharedcache: таймаут должен быть числом, '
+                f'а не {self.timeout.var!r}'
+            )
+        key = make_template_fragment_key(
+            self.fragment_name,
+            [variable.resolve(context) for variable in self.vary_on],
+        )
+        return cache.get_or_compute(
+            key, lambda: self.nodelist.render(context), timeout
+        )
+
+
+@register.tag
+def sharedcache(parser, token):
+    """Как ``{% cache %}``, но фрагмент пересчитывает один процесс.
+
+    Фрагмент читается через ``core.cache.get_or_compute``: когда срок
+    подходит, его заранее перерисовывает один запрос, а остальные
+    отдают прежнюю версию.
+
+        {% sharedcache 300 name var1 var2 %} ... {% endsharedcache %}
+    """
+    nodelist = parser.parse(('endsharedcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]} принимает как минимум два аргумента'
+        )
+    return SharedCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(token) for token in tokens[3:]],
+    )
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core import cache as shared_cache
+
+CACHE_DIR = tempfile.mkdtemp()
+PROCESSES = 8
+
+
+def fetch(key, computed_dir, barrier, results, delay=0.3):
+    """Процесс-клиент: берёт значение из общего кэша."""
+
+    def compute():
+        open(os.path.join(computed_dir, str(os.getpid())), 'w').close()
+        time.sleep(delay)
+        return os.getpid()
+
+    barrier.wait()
+    results.put(shared_cache.get_or_compute(key, compute, 60))
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    'LOCATION': CACHE_DIR,
+}}, CACHE_LOCK_DIR=os.path.join(CACHE_DIR, 'locks'))
+class SharedCacheTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.computed_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.computed_dir, True)
+
+    def run_clients(self, key):
+        """Запускает клиентов одновременно, возвращает их ответы."""
+        context = multiprocessing.get_context('fork')
+        barrier = context.Barrier(PROCESSES)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=fetch,
+                args=(key, self.computed_dir, barrier, results),
+            )
+            for _ in range(PROCESSES)
+        ]
+        for process in processes:
+            process.start()
+        values = [results.get(timeout=30) for _ in processes]
+        for process in processes:
+            process.join()
+        return values
+
+    def test_value_computed_once_for_all_processes(self):
+        """Пустую запись считает один процесс, остальные ждут его"""
+        values = self.run_clients('hot')
+        computed = os.listdir(self.computed_dir)
+        self.assertEqual(len(computed), 1)
+        self.assertEqual(set(values), {int(computed[0])})
+        self.assertEqual(
+            shared_cache.get_or_compute('hot', self.fail, 60),
+            values[0],
+        )
+
+    def test_stale_value_served_while_recomputing(self):
+        """Пока запись пересчитывают, остальным отдаётся прежнее значение"""
+        cache.set('hot', ('old', time.time() - 1, 0), 60)
+        guard = shared_cache.lock('hot')
+        self.assertTrue(guard.try_acquire())
+        try:
+            values = self.run_clients('hot')
+        finally:
+            guard.release()
+        self.assertEqual(values, ['old'] * PROCESSES)
+        self.assertEqual(os.listdir(self.computed_dir), [])
+
+    def test_expired_value_recomputed(self):
+        """Истёкшая запись пересчитывается"""
+        cache.set('hot', ('old', time.time() - 1, 0), 60)
+        self.assertEqual(
+            shared_cache.get_or_compute('hot', lambda: 'new', 60), 'new'
+        )
+
+    def test_bump_changes_keys(self):
+        """Новое поколение пространства даёт новые ключи"""
+        key = shared_cache.make_key('feed', 'page', 1)
+        self.assertEqual(shared_cache.make_key('feed', 'page', 1), key)
+        shared_cache.bump('feed')
+        self.assertNotEqual(shared_cache.make_key('feed', 'page', 1), key)
@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post
+
+from core import metrics
+
+User = get_user_model()
+METRICS_DIR = tempfile.mkdtemp()
+
+
+@override_settings(REQUEST_METRICS_DIR=METRICS_DIR)
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        Post.objects.create(author=cls.author, text='Пост')
+        cls.staff = User.objects.create(username='Staff', is_staff=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+
+    def test_server_timing_header(self):
+        """Ответ содержит Server-Timing с SQL, шаблонами и кэшем"""
+        response = self.client.get(reverse('posts:index'))
+        header = response['Server-Timing']
+        self.assertRegex(header, r'sql;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('tpl;dur=', header)
+        self.assertRegex(header, r'cache;desc="\d+ hits, [1-9]\d* misses"')
+        self.assertRegex(header, r'total;dur=[\d.]+')
+        response = self.client.get(reverse('posts:index'))
+        self.assertRegex(
+            response['Server-Timing'], r'cache;desc="[1-9]\d* hits'
+        )
+
+    def test_histograms_by_view_name(self):
+        """Гистограммы копятся по имени представления"""
+        for _ in range(3):
+            self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:profile', args=(self.author,)))
+        metrics.registry.flush()
+        summary = metrics.summary(metrics.collect())
+        self.assertEqual(summary['posts:index']['requests'], 3)
+        self.assertEqual(summary['posts:profile']['requests'], 1)
+        self.assertEqual(
+            sum(summary['posts:index']['queries']['buckets'].values()), 3
+        )
+        self.assertGreater(summary['posts:profile']['queries']['max'], 0)
+
+    def test_staff_only_endpoint(self):
+        """Страница метрик доступна только персоналу"""
+        url = reverse('core:request_metrics')
+        self.assertEqual(url, '/admin/metrics/')
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+        staff = Client()
+        staff.force_login(self.staff)
+        response = staff.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('posts:index', response.json())
+
+    def test_dump_command(self):
+        """Команда request_metrics выводит сводку и сбрасывает метрики"""
+        self.client.get(reverse('posts:index'))
+        metrics.registry.flush()
+        out = StringIO()
+        call_command('request_metrics', stdout=out)
+        self.assertIn('posts:index', out.getvalue())
+        lines = out.getvalue().splitlines()
+        self.assertEqual({len(line) for line in lines}, {len(lines[0])})
+        call_command('request_metrics', reset=True, stdout=StringIO())
+        out = StringIO()
+        call_command('request_metrics', stdout=out)
+        self.assertNotIn('posts:index', out.getvalue())
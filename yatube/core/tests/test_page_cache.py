@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+from posts.tests.utils import run_on_commit
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.reader = User.objects.create(username='Reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+            reverse('about:author'),
+        )
+
+    def test_guest_pages_served_without_queries(self):
+        """Повторный запрос гостя отдаётся из кэша без обращения к базе"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.client.get(url)
+                self.assertEqual(second.content, first.content)
+
+    def test_query_string_is_part_of_key(self):
+        """Страницы с разными параметрами кэшируются отдельно"""
+        url = self.urls[0]
+        self.client.get(url)
+        response = self.client.get(url, {'page': 1})
+        self.assertIsNotNone(response.context)
+
+    def test_authenticated_users_bypass_cache(self):
+        """Вошедший пользователь получает свежую страницу"""
+        url = self.urls[0]
+        self.client.get(url)
+        self.client.force_login(self.reader)
+        response = self.client.get(url)
+        self.assertIsNotNone(response.context)
+        self.assertContains(response, 'Reader')
+
+    @override_settings(
+        PAGE_CACHE_VIEWS=settings.PAGE_CACHE_VIEWS + ('users:login',)
+    )
+    def test_csrf_pages_not_cached(self):
+        """Страница с CSRF-токеном не кэшируется"""
+        url = reverse('users:login')
+        self.client.get(url)
+        response = Client().get(url)
+        self.assertIsNotNone(response.context)
+
+    def test_cached_page_revalidated(self):
+        """Закэшированная страница отвечает 304 на свой ETag"""
+        url = self.urls[0]
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_purge_pages(self):
+        """Пост, комментарий и подписка сбрасывают свои страницы"""
+        changes = {
+            self.urls[0]: lambda: Post.objects.create(
+                author=self.reader, text='Новый пост'
+            ),
+            self.urls[1]: lambda: Post.objects.create(
+                author=self.reader, text='Пост в группе', group=self.group
+            ),
+            self.urls[2]: lambda: Follow.objects.create(
+                user=self.reader, author=self.author
+            ),
+            self.urls[3]: lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий'
+            ),
+        }
+        for url, change in changes.items():
+            with self.subTest(url=url):
+                self.client.get(url)
+                with run_on_commit():
+                    change()
+                self.assertIsNotNone(self.client.get(url).context)
+
+    def test_unrelated_profile_stays_cached(self):
+        """Пост автора не сбрасывает чужой профиль"""
+        url = reverse('posts:profile', args=(self.reader.username,))
+        self.client.get(url)
+        Post.objects.create(author=self.author, text='Ещё пост')
+        self.assertIsNone(self.client.get(url).context)
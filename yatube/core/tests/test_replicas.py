@@ -0,0 +1,190 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.http import HttpResponse
+from django.test import (RequestFactory, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import resolve, reverse
+from posts.models import Post
+
+from core import replicas
+from core.middleware import ReplicaMiddleware
+
+User = get_user_model()
+REPLICA = 'replica_test'
+
+
+@override_settings(READ_REPLICAS=['replica1'])
+class ReplicaRoutingTests(TestCase):
+    def read_alias_for(self, url, method='get', cookies=None, write=False,
+                       status=200):
+        """Прогоняет запрос через middleware и возвращает базу для чтения."""
+        request = getattr(RequestFactory(), method)(url)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(url)
+        seen = {}
+
+        def view(request):
+            middleware.process_view(request, None, (), {})
+            if write:
+                router.db_for_write(Post)
+            seen['alias'] = router.db_for_read(Post)
+            return HttpResponse(status=status)
+
+        middleware = ReplicaMiddleware(view)
+        response = middleware(request)
+        seen['response'] = response
+        return seen
+
+    def test_feed_views_read_from_replica(self):
+        """Ленточные страницы читают с реплики"""
+        for url in (reverse('posts:index'),
+                    reverse('posts:profile', args=('author',))):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.read_alias_for(url)['alias'], 'replica1'
+                )
+        self.assertEqual(router.db_for_read(Post), replicas.PRIMARY)
+
+    def test_other_views_read_from_primary(self):
+        """Прочие страницы и небезопасные методы читают с основной базы"""
+        self.assertEqual(
+            self.read_alias_for(reverse('posts:search'))['alias'],
+            replicas.PRIMARY,
+        )
+        self.assertEqual(
+            self.read_alias_for(reverse('posts:index'), 'post')['alias'],
+            replicas.PRIMARY,
+        )
+
+    def test_write_pins_user_to_primary(self):
+        """После записи пользователь временно читает с основной базы"""
+        seen = self.read_alias_for(
+            reverse('posts:post_create'), 'post', write=True
+        )
+        cookie = seen['response'].cookies['db_pin']
+        self.assertEqual(cookie['max-age'], 10)
+        seen = self.read_alias_for(
+            reverse('posts:index'), cookies={'db_pin': '1'}
+        )
+        self.assertEqual(seen['alias'], replicas.PRIMARY)
+
+    def test_pin_only_after_successful_write(self):
+        """Без записи или при ошибке пользователь не закрепляется"""
+        url = reverse('posts:post_create')
+        for method, write, status in (('get', False, 200),
+                                      ('post', False, 200),
+                                      ('post', True, 500)):
+            with self.subTest(method=method, write=write, status=status):
+                seen = self.read_alias_for(url, method, write=write,
+                                           status=status)
+                self.assertNotIn('db_pin', seen['response'].cookies)
+
+    def test_only_posts_models_read_from_replica(self):
+        """Сессии и пользователи читаются с основной базы"""
+        request = RequestFactory().get(reverse('posts:index'))
+        request.resolver_match = resolve(reverse('posts:index'))
+        seen = {}
+
+        def view(request):
+            middleware.process_view(request, None, (), {})
+            seen['aliases'] = [
+                router.db_for_read(model) for model in (Post, User, Session)
+            ]
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(view)
+        middleware(request)
+        self.assertEqual(
+            seen['aliases'], ['replica1', replicas.PRIMARY, replicas.PRIMARY]
+        )
+
+    def test_write_inside_request_returns_reads_to_primary(self):
+        """Запись посреди запроса переводит чтения на основную базу"""
+        seen = self.read_alias_for(reverse('posts:index'), write=True)
+        self.assertEqual(seen['alias'], replicas.PRIMARY)
+        self.assertEqual(router.db_for_write(Post), replicas.PRIMARY)
+
+    def test_replicas_are_not_migrated(self):
+        """Схема реплик приходит копированием, а не миграциями"""
+        self.assertFalse(router.allow_migrate('replica1', 'posts'))
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+
+
+@override_settings(READ_REPLICAS=[REPLICA])
+class SQLiteReplicaTests(TransactionTestCase):
+    """Чтения с отдельной базы-копии, которая отстаёт от основной"""
+
+    databases = {DEFAULT_DB_ALIAS, REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.replica_dir, 'replica.sqlite3'),
+        }
+        connections.ensure_defaults(REPLICA)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        shutil.rmtree(cls.replica_dir, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='Author')
+        Post.objects.create(author=self.author, text='Есть на реплике')
+
+    def replicate(self):
+        """Снимает копию основной базы, как это делает репликация."""
+        source = connections[DEFAULT_DB_ALIAS]
+        source.ensure_connection()
+        connections[REPLICA].close()
+        target = sqlite3.connect(connections.databases[REPLICA]['NAME'])
+        try:
+            source.connection.backup(target)
+        finally:
+            target.close()
+
+    def test_lagging_replica(self):
+        """Посты читаются с реплики, вход и новый пост — с основной базы"""
+        self.replicate()
+        reader = User.objects.create(username='Reader')
+        Post.objects.create(author=self.author, text='Только в основной')
+        self.client.force_login(reader)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Есть на реплике')
+        self.assertNotContains(response, 'Только в основной')
+        # Пользователь и сессия есть только в основной базе.
+        self.assertEqual(response.context['user'], reader)
+        self.assertNotIn('db_pin', response.cookies)
+
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Моя правка'}
+        )
+        self.assertIn('db_pin', response.cookies)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Моя правка')
+
+    def test_login_pins_user(self):
+        """Вход пишет в базу и закрепляет за основной"""
+        User.objects.create_user(username='Reader', password='Pass-word-1')
+        response = self.client.post(
+            reverse('users:login'),
+            {'username': 'Reader', 'password': 'Pass-word-1'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('db_pin', response.cookies)
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertNotIn('db_pin', response.cookies)
@@ -0,0 +1,72 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import TestCase, TransactionTestCase, override_settings
+from posts.models import Post, User
+
+PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -2000,
+    'mmap_size': 1024 * 1024,
+    'busy_timeout': 1234,
+}
+
+
+class SQLiteTuningTests(TestCase):
+    def pragmas_of(self, name, pragmas=PRAGMAS):
+        """Открывает соединение к базе и читает её прагмы."""
+        wrapper = DatabaseWrapper(
+            dict(connection.settings_dict, NAME=name), alias='tuning'
+        )
+        try:
+            wrapper.ensure_connection()
+            return {
+                pragma: wrapper.connection.execute(
+                    f'PRAGMA {pragma}'
+                ).fetchone()[0]
+                for pragma in pragmas
+            }
+        finally:
+            wrapper.close()
+
+    @override_settings(SQLITE_PRAGMAS=PRAGMAS)
+    def test_file_database_gets_pragmas(self):
+        """Новое соединение к файлу получает прагмы из настроек"""
+        with tempfile.TemporaryDirectory() as directory:
+            pragmas = self.pragmas_of(os.path.join(directory, 'db.sqlite3'))
+        self.assertEqual(pragmas, {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'cache_size': -2000,
+            'mmap_size': 1024 * 1024,
+            'busy_timeout': 1234,
+        })
+
+    @override_settings(SQLITE_PRAGMAS=PRAGMAS)
+    def test_memory_database_is_left_alone(self):
+        """База в памяти не переводится в WAL"""
+        pragmas = self.pragmas_of(
+            ':memory:', ('journal_mode', 'busy_timeout')
+        )
+        self.assertEqual(pragmas['journal_mode'], 'memory')
+        self.assertNotEqual(pragmas['busy_timeout'], 1234)
+
+
+class SQLiteBenchmarkTests(TransactionTestCase):
+    def test_benchmark_runs_both_profiles(self):
+        """Бенчмарк гоняет нагрузку с профилем и без него"""
+        user = User.objects.create_user(username='bench')
+        Post.objects.create(author=user, text='Пост для нагрузки')
+        out = StringIO()
+        call_command(
+            'bench_sqlite', readers=1, writers=1, seconds=0.3, startup=2,
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:]],
+                         ['off', 'on'])
@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from . import metrics
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -12,3 +16,12 @@ def permission_denied_view(request, exception):
 
 def internal_server_error(request, *args, **argv):
     return render(request, 'core/500.html', {'path': request.path}, status=500)
+
+
+@staff_member_required
+def request_metrics(request):
+    metrics.registry.flush()
+    return JsonResponse(
+        metrics.summary(metrics.collect()),
+        json_dumps_params={'ensure_ascii': False, 'indent': 2},
+    )
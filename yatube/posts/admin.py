@@ -1,5 +1,6 @@
 from django.contrib import admin
 
+from . import fulltext
 from .models import Group, Post
 
 
@@ -17,5 +18,14 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по полнотекстовому индексу вместо LIKE по всей таблице."""
+        query = fulltext.match_query(search_term)
+        if query is None or not fulltext.available():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return queryset.filter(search_entry__text__match=query), False
+
 
 admin.site.register(Group)
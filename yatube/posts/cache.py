@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from core import cache as shared_cache
+
+from .paginators import CursorPaginator, paginate
+
+FEED_NAMESPACE = 'posts:feed'
+COMMENTS_NAMESPACE = 'posts:comments:{}'
+FOLLOWS_NAMESPACE = 'posts:follows:{}'
+FOLLOWERS_NAMESPACE = 'posts:followers:{}'
+POST_CARD_FRAGMENT = 'post_card'
+
+
+def feed_version():
+    """Текущее поколение кэша лент."""
+    return shared_cache.version(FEED_NAMESPACE)
+
+
+def invalidate_feeds():
+    shared_cache.bump(FEED_NAMESPACE)
+    # Ленты и группы гостей сбрасываются целиком: пост мог уйти из
+    # прежней группы.
+    shared_cache.purge_pages('posts:index')
+    shared_cache.purge_pages('posts:group_list')
+    shared_cache.purge_pages('posts:group_index')
+
+
+def comments_version(post_id):
+    """Текущее поколение кэша комментариев поста."""
+    return shared_cache.version(COMMENTS_NAMESPACE.format(post_id))
+
+
+def invalidate_comments(post_id):
+    shared_cache.bump(COMMENTS_NAMESPACE.format(post_id))
+    shared_cache.purge_pages('posts:post_detail', post_id=post_id)
+
+
+def follows_version(user_id):
+    """Текущее поколение подписок пользователя."""
+    return shared_cache.version(FOLLOWS_NAMESPACE.format(user_id))
+
+
+def invalidate_follows(user_id):
+    shared_cache.bump(FOLLOWS_NAMESPACE.format(user_id))
+
+
+def invalidate_followers(author_id):
+    shared_cache.bump(FOLLOWERS_NAMESPACE.format(author_id))
+
+
+def invalidate_follow(user, author):
+    """Сбрасывает поколения подписок пары и страницы их профилей.
+
+    Вызывается после фиксации транзакции: иначе другой запрос успел бы
+    закэшировать граф подписок до изменения.
+    """
+    invalidate_follows(user.pk)
+    invalidate_followers(author.pk)
+    purge_profile_pages(user.username, author.username)
+
+
+def invalidate_post(post_id):
+    """Сбрасывает карточку поста и все страницы лент, где она была."""
+    cache.delete(make_template_fragment_key(POST_CARD_FRAGMENT, [post_id]))
+    shared_cache.purge_pages('posts:post_detail', post_id=post_id)
+    invalidate_feeds()
+
+
+def feed_cache_context():
+    """Переменные контекста для кэширования фрагментов лент."""
+    return {
+        'feed_version': feed_version(),
+        'feed_cache_timeout': settings.FEED_CACHE_TIMEOUT,
+        'post_card_timeout': settings.POST_CARD_CACHE_TIMEOUT,
+    }
+
+
+def feed_page(request, name, queryset, count=None):
+    """Страница ленты ``name`` из общего для процессов кэша.
+
+    В кэш кладутся посты страницы и курсоры соседей, а не сама страница:
+    с ней туда попал бы весь queryset. Ключ зависит от поколения лент.
+    Старые ссылки ``?page=N`` не кэшируются.
+    """
+    if 'page' in request.GET and 'cursor' not in request.GET:
+        return paginate(request, queryset, count)
+    cursor = request.GET.get('cursor')
+    paginator = CursorPaginator(queryset, settings.POSTS_AMOUNT)
+
+    def compute():
+        page = paginator.page(cursor)
+        return {
+            'items': list(page.object_list),
+            'number': page.number,
+            'num_pages': paginator.num_pages,
+            'next_cursor': paginator.next_cursor,
+            'previous_cursor': paginator.previous_cursor,
+        }
+
+    state = shared_cache.get_or_compute(
+        shared_cache.make_key(FEED_NAMESPACE, name, cursor),
+        compute, settings.FEED_CACHE_TIMEOUT,
+    )
+    paginator.num_pages = state['num_pages']
+    paginator.next_cursor = state['next_cursor']
+    paginator.previous_cursor = state['previous_cursor']
+    return paginator._get_page(state['items'], state['number'], paginator)
+
+
+def profile_pages_version(username):
+    """Поколение закэшированных страниц профиля."""
+    return shared_cache.version(
+        shared_cache.page_namespace('posts:profile', username=username)
+    )
+
+
+def purge_profile_pages(*usernames):
+    """Сбрасывает страницы профилей, закэшированные для гостей."""
+    for username in usernames:
+        shared_cache.purge_pages('posts:profile', username=username)
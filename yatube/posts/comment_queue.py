@@ -0,0 +1,263 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import cache, stats
+from .models import Comment, Post, User
+
+logger = logging.getLogger(__name__)
+
+PENDING_FILE = 'pending.jsonl'
+WRITER_LOCK = 'writer.lock'
+BATCH_PREFIX = 'batch-'
+PENDING_COOKIE = 'pending_comments'
+PENDING_SALT = 'posts.comment_queue'
+# Сколько своих неразобранных комментариев помнит cookie и сколько
+# символов текста в нём хранится: cookie не должна превысить 4 КБ.
+PENDING_COOKIE_ENTRIES = 3
+PENDING_COOKIE_TEXT = 300
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _path(name):
+    return os.path.join(settings.COMMENT_QUEUE_DIR, name)
+
+
+@contextmanager
+def _locked(name, flags=os.O_RDWR | os.O_CREAT):
+    fd = os.open(_path(name), flags, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield fd
+    finally:
+        os.close(fd)
+
+
+def _append(line):
+    """Дописывает строку в очередь и сбрасывает её на диск.
+
+    Писатель мог успеть переименовать файл, пока мы ждали блокировку;
+    тогда пишем в новый файл очереди.
+    """
+    path = _path(PENDING_FILE)
+    while True:
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+        with _locked(PENDING_FILE, flags) as fd:
+            try:
+                current = os.stat(path).st_ino
+            except FileNotFoundError:
+                continue
+            if os.fstat(fd).st_ino != current:
+                continue
+            os.write(fd, line.encode() + b'\n')
+            os.fsync(fd)
+            return
+
+
+def enqueue(post_id, author_id, text):
+    """Ставит комментарий в очередь на запись; возвращает его запись."""
+    os.makedirs(settings.COMMENT_QUEUE_DIR, exist_ok=True)
+    entry = {
+        'key': uuid.uuid4().hex,
+        'post': post_id,
+        'author': author_id,
+        'text': text,
+        'created': timezone.now().isoformat(),
+    }
+    _append(json.dumps(entry, ensure_ascii=False))
+    start_writer()
+    return entry
+
+
+def _rotate():
+    """Переименовывает накопленную очередь в пачку для записи."""
+    if not os.path.exists(_path(PENDING_FILE)):
+        return
+    with _locked(PENDING_FILE):
+        if os.path.getsize(_path(PENDING_FILE)):
+            name = f'{BATCH_PREFIX}{time.time_ns()}-{os.getpid()}.jsonl'
+            os.rename(_path(PENDING_FILE), _path(name))
+
+
+def _read(path):
+    entries = []
+    with open(path, encoding='utf-8') as batch:
+        for line in batch:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                logger.warning('Пропущена битая строка в %s', path)
+    return entries
+
+
+def comments_added(comments):
+    """Побочные эффекты новых комментариев, сгруппированные по пачке.
+
+    Общие для сигнала модели и записи очереди: счётчик сдвигается одним
+    UPDATE на автора, поколение комментариев поста сбрасывается один раз
+    и только после фиксации транзакции.
+    """
+    authors = Counter(comment.author_id for comment in comments)
+    for author_id, count in authors.items():
+        stats.shift(author_id, comments_count=count)
+    post_ids = {comment.post_id for comment in comments}
+
+    def invalidate():
+        for post_id in post_ids:
+            cache.invalidate_comments(post_id)
+
+    transaction.on_commit(invalidate)
+
+
+def _write(entries):
+    """Записывает пачку комментариев с временем постановки в очередь.
+
+    Комментарии вставляются через ``bulk_create`` без сигналов модели,
+    их эффекты применяет comments_added() разом на всю пачку. ``created``
+    с ``auto_now_add`` при вставке задать нельзя, поэтому время из
+    очереди проставляется следом одним запросом. Повторная запись после
+    сбоя не создаёт дублей: у комментария уникальный ключ очереди.
+    """
+    post_ids = set(Post.objects.filter(
+        pk__in={entry['post'] for entry in entries}
+    ).values_list('pk', flat=True))
+    author_ids = set(User.objects.filter(
+        pk__in={entry['author'] for entry in entries}
+    ).values_list('pk', flat=True))
+    written = set(Comment.objects.filter(
+        ingest_key__in=[entry['key'] for entry in entries]
+    ).values_list('ingest_key', flat=True))
+    comments = []
+    created = {}
+    for entry in entries:
+        if (entry['key'] in written
+                or entry['post'] not in post_ids
+                or entry['author'] not in author_ids):
+            continue
+        written.add(entry['key'])
+        comments.append(Comment(
+            post_id=entry['post'],
+            author_id=entry['author'],
+            text=entry['text'],
+            ingest_key=entry['key'],
+        ))
+        created[entry['key']] = parse_datetime(entry['created'])
+    if not comments:
+        return 0
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        Comment.objects.filter(ingest_key__in=created).update(created=Case(
+            *(When(ingest_key=key, then=Value(queued))
+              for key, queued in created.items()),
+            output_field=DateTimeField(),
+        ))
+        comments_added(comments)
+    return len(comments)
+
+
+def flush():
+    """Переносит очередь в базу пачками; возвращает число комментариев."""
+    if not os.path.isdir(settings.COMMENT_QUEUE_DIR):
+        return 0
+    written = 0
+    with _locked(WRITER_LOCK):
+        _rotate()
+        batches = sorted(
+            name for name in os.listdir(settings.COMMENT_QUEUE_DIR)
+            if name.startswith(BATCH_PREFIX)
+        )
+        for name in batches:
+            entries = _read(_path(name))
+            size = settings.COMMENT_QUEUE_BATCH_SIZE
+            for start in range(0, len(entries), size):
+                written += _write(entries[start:start + size])
+            os.remove(_path(name))
+    return written
+
+
+def _run_writer():
+    while True:
+        time.sleep(settings.COMMENT_QUEUE_FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            logger.exception('Не удалось записать очередь комментариев')
+        finally:
+            connections.close_all()
+
+
+def start_writer():
+    """Запускает фоновый писатель процесса, если он ещё не запущен.
+
+    При ``COMMENT_QUEUE_WRITER = False`` очередь разбирается только
+    явным flush() или командой flush_comments.
+    """
+    global _writer
+    if not settings.COMMENT_QUEUE_WRITER:
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(
+                target=_run_writer, name='comment-writer', daemon=True
+            )
+            _writer.start()
+
+
+def remember(request, response, entry):
+    """Запоминает комментарий в подписанной cookie автора до записи."""
+    pending = _pending(request)[-(PENDING_COOKIE_ENTRIES - 1):]
+    pending.append({
+        'key': entry['key'],
+        'post': entry['post'],
+        'author': entry['author'],
+        'text': entry['text'][:PENDING_COOKIE_TEXT],
+    })
+    response.set_cookie(
+        PENDING_COOKIE,
+        signing.dumps(pending, salt=PENDING_SALT, compress=True),
+        max_age=settings.COMMENT_QUEUE_PENDING_AGE,
+        httponly=True,
+        samesite='Lax',
+    )
+
+
+def _pending(request):
+    try:
+        pending = signing.loads(
+            request.COOKIES.get(PENDING_COOKIE, ''),
+            salt=PENDING_SALT,
+            max_age=settings.COMMENT_QUEUE_PENDING_AGE,
+        )
+    except (signing.BadSignature, ValueError):
+        return []
+    return pending if isinstance(pending, list) else []
+
+
+def pending_for(request, post_id):
+    """Свои комментарии к посту, которые ещё ждут записи в базу."""
+    pending = [
+        entry for entry in _pending(request)
+        if entry.get('post') == post_id
+        and entry.get('author') == request.user.pk
+    ]
+    if not pending:
+        return []
+    written = set(Comment.objects.filter(
+        ingest_key__in=[entry['key'] for entry in pending]
+    ).values_list('ingest_key', flat=True))
+    return [entry for entry in pending if entry['key'] not in written]
@@ -0,0 +1,53 @@
+import hashlib
+
+from . import cache, comment_queue
+
+
+def _etag(request, *parts):
+    """ETag страницы для текущего пользователя и его CSRF-cookie.
+
+    Страницы различаются шапкой и формами для разных пользователей,
+    поэтому один и тот же ETag не должен подойти другому.
+    """
+    user = request.user.pk if request.user.is_authenticated else ''
+    raw = ':'.join(str(part) for part in (
+        user, request.META.get('CSRF_COOKIE', ''), *parts
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _follows_version(request):
+    """Поколение подписок пользователя: от них зависят кнопки подписки."""
+    if request.user.is_authenticated:
+        return cache.follows_version(request.user.pk)
+    return ''
+
+
+def index_etag(request):
+    return _etag(request, cache.feed_version(), _follows_version(request))
+
+
+def group_etag(request, slug):
+    return _etag(request, cache.feed_version(), _follows_version(request))
+
+
+def profile_etag(request, username):
+    # Поколение страниц профиля меняется и при подписках других
+    # пользователей: от них зависит число подписчиков автора.
+    return _etag(
+        request, cache.feed_version(), _follows_version(request),
+        cache.profile_pages_version(username),
+    )
+
+
+def post_etag(request, post_id):
+    return _etag(
+        request, cache.feed_version(), cache.comments_version(post_id),
+        request.COOKIES.get(comment_queue.PENDING_COOKIE, ''),
+    )
+
+
+def follow_etag(request):
+    return _etag(
+        request, cache.feed_version(), cache.follows_version(request.user.pk)
+    )
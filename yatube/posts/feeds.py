@@ -0,0 +1,77 @@
+from django.conf import settings
+
+from .models import FeedEntry, Follow, Post
+from .paginators import paginate
+
+# Порядок совпадает с индексом (user, -pub_date, -post) ленты.
+ENTRY_ORDERING = ('-pub_date', '-post_id')
+
+
+def _entries(pairs):
+    return [
+        FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for user_id, post_id, pub_date in pairs
+    ]
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам всех подписчиков автора."""
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        _entries((user_id, post.pk, post.pub_date) for user_id in followers),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def add_author(user_id, author_id):
+    """Добавляет в ленту пользователя посты автора, на которого он
+    подписался."""
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )
+    FeedEntry.objects.bulk_create(
+        _entries((user_id, pk, pub_date) for pk, pub_date in posts.iterator()),
+        batch_size=settings.FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def remove_author(user_id, author_id):
+    """Убирает из ленты пользователя посты автора после отписки."""
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild(user):
+    """Пересобирает ленту пользователя с нуля по его подпискам."""
+    FeedEntry.objects.filter(user=user).delete()
+    for author_id in Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True
+    ):
+        add_author(user.pk, author_id)
+
+
+def entries(user):
+    """Записи ленты пользователя: ключи постов и даты для курсора."""
+    return FeedEntry.objects.filter(user=user).values('post_id', 'pub_date')
+
+
+def feed_page(request, user):
+    """Страница ленты подписок.
+
+    Курсор идёт только по индексу ленты, без соединения с постами; посты
+    страницы дочитываются по первичному ключу вторым запросом.
+    """
+    page_obj = paginate(request, entries(user), ordering=ENTRY_ORDERING)
+    posts = Post.objects.for_feed().in_bulk(
+        [entry['post_id'] for entry in page_obj]
+    )
+    page_obj.object_list = [
+        posts[entry['post_id']] for entry in page_obj
+        if entry['post_id'] in posts
+    ]
+    return page_obj
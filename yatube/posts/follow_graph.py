@@ -0,0 +1,149 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.db import IntegrityError, router, transaction
+
+from core import cache as shared_cache
+
+from . import cache, feeds, stats
+from .models import Follow
+
+# Беззнаковые 32-битные id: 4 байта на подписку в кэше.
+TYPECODE = 'I'
+FOLLOWING = (cache.FOLLOWS_NAMESPACE, 'user', 'author')
+FOLLOWERS = (cache.FOLLOWERS_NAMESPACE, 'author', 'user')
+
+
+def _adjacency(direction, user_ids):
+    """Отсортированные массивы соседей пользователей ``user_ids``.
+
+    Массивы лежат в общем кэше байтами в поколении подписок владельца;
+    все промахи дочитываются из базы одним запросом.
+    """
+    namespace, owner, other = direction
+    keys = {
+        user_id: shared_cache.make_key(namespace.format(user_id), owner)
+        for user_id in user_ids
+    }
+    found = default_cache.get_many(keys.values())
+    result = {}
+    for user_id, key in keys.items():
+        if key in found:
+            result[user_id] = array(TYPECODE)
+            result[user_id].frombytes(found[key])
+    missing = [user_id for user_id in keys if user_id not in result]
+    if missing:
+        for user_id in missing:
+            result[user_id] = array(TYPECODE)
+        rows = Follow.objects.filter(**{f'{owner}__in': missing}).order_by(
+            owner, other).values_list(f'{owner}_id', f'{other}_id')
+        for user_id, other_id in rows:
+            result[user_id].append(other_id)
+        default_cache.set_many(
+            {keys[user_id]: result[user_id].tobytes() for user_id in missing},
+            settings.FOLLOW_GRAPH_CACHE_TIMEOUT,
+        )
+    return result
+
+
+def following(user_id):
+    """Авторы, на которых подписан пользователь, по возрастанию id."""
+    return _adjacency(FOLLOWING, [user_id])[user_id]
+
+
+def followers(user_id):
+    """Подписчики автора по возрастанию id."""
+    return _adjacency(FOLLOWERS, [user_id])[user_id]
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def is_following(user_id, author_id):
+    if user_id is None:
+        return False
+    return _contains(following(user_id), author_id)
+
+
+def follows(user_id, author_ids):
+    """Какие из авторов ``author_ids`` есть в подписках пользователя.
+
+    Одно чтение из кэша на любое число авторов: этого хватает, чтобы
+    нарисовать кнопки подписки у всех постов страницы.
+    """
+    if user_id is None:
+        return set()
+    ids = following(user_id)
+    return {author_id for author_id in author_ids
+            if _contains(ids, author_id)}
+
+
+def mutual(user_id):
+    """Пользователи, с которыми подписки взаимные, по возрастанию id."""
+    return sorted(set(following(user_id)) & set(followers(user_id)))
+
+
+def suggestions(user_id, limit=5):
+    """Авторы, которых читают те, кого читает пользователь.
+
+    Чем больше его подписок читают автора, тем выше он в списке.
+    Учитываются не больше ``FOLLOW_SUGGESTION_SOURCES`` подписок.
+    """
+    followed = following(user_id)
+    sources = followed[-settings.FOLLOW_SUGGESTION_SOURCES:]
+    counts = Counter()
+    for ids in _adjacency(FOLLOWING, sources).values():
+        counts.update(ids)
+    excluded = set(followed)
+    excluded.add(user_id)
+    ranked = sorted(
+        (author_id for author_id in counts if author_id not in excluded),
+        key=lambda author_id: (-counts[author_id], author_id),
+    )
+    return ranked[:limit]
+
+
+def follow(user, author):
+    """Подписывает пользователя на автора одним INSERT.
+
+    Повторную и одновременную подписку отсекает ограничение
+    ``unique_follow``. Счётчики и лента обновляются сигналами в той же
+    транзакции, поколения кэша — после её фиксации. Возвращает,
+    появилась ли подписка.
+    """
+    try:
+        with transaction.atomic():
+            Follow.objects.create(user=user, author=author)
+    except IntegrityError:
+        return False
+    return True
+
+
+def unfollow(user, author):
+    """Отписывает пользователя от автора; возвращает, была ли подписка.
+
+    Подписка удаляется одним DELETE мимо сигналов, и побочные эффекты
+    зависят от числа удалённых строк: из двух одновременных отписок
+    счётчики уменьшит только одна. Прочие удаления подписок проходят
+    через сигнал ``post_delete`` с теми же эффектами.
+    """
+    subscriptions = Follow.objects.filter(user=user, author=author)
+    with transaction.atomic():
+        if not subscriptions._raw_delete(router.db_for_write(Follow)):
+            return False
+        unfollowed(user, author)
+    return True
+
+
+def unfollowed(user, author):
+    """Счётчики и лента меняются в транзакции удаления подписки,
+    поколения кэша — после её фиксации."""
+    stats.shift(author.pk, followers_count=-1)
+    stats.shift(user.pk, following_count=-1)
+    feeds.remove_author(user.pk, author.pk)
+    transaction.on_commit(lambda: cache.invalidate_follow(user, author))
@@ -0,0 +1,84 @@
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Post, PostSearch
+
+TABLE = PostSearch._meta.db_table
+# Метки подсветки: управляющие символы не встречаются в тексте постов
+# и переживают экранирование HTML.
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+SNIPPET_TOKENS = 32
+MAX_TERMS = 10
+TERM_RE = re.compile(r'\w+')
+
+
+def available():
+    return connection.vendor == 'sqlite'
+
+
+def match_query(text):
+    """Запрос FTS5 из слов строки: все слова обязательны, ищутся префиксы.
+
+    Кавычки и операторы пользователя отбрасываются, поэтому синтаксических
+    ошибок FTS5 не бывает. Возвращает None, если слов нет.
+    """
+    terms = TERM_RE.findall(text)[:MAX_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search(text):
+    """Посты по запросу с оценкой ``rank`` (меньше — лучше) и ``snippet``."""
+    query = match_query(text)
+    posts = Post.objects.for_feed()
+    if query is None or not available():
+        found = posts.filter(text__icontains=text).annotate(
+            rank=Value(0.0, output_field=FloatField()),
+            snippet=F('text'),
+        )
+        return found.none() if query is None else found
+    return posts.filter(search_entry__text__match=query).annotate(
+        rank=RawSQL(f'bm25("{TABLE}")', ()),
+        snippet=RawSQL(
+            f'snippet("{TABLE}", 0, %s, %s, %s, %s)',
+            (HIGHLIGHT_START, HIGHLIGHT_END, '…', SNIPPET_TOKENS),
+        ),
+    )
+
+
+def index_post(post):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{TABLE}" WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO "{TABLE}" (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text],
+        )
+
+
+def remove_post(post_id):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{TABLE}" WHERE rowid = %s', [post_id])
+
+
+def rebuild(after_id=0):
+    """Переиндексирует посты с id больше ``after_id``; по умолчанию все."""
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{TABLE}" WHERE rowid > %s', [after_id])
+        cursor.execute(
+            f'INSERT INTO "{TABLE}" (rowid, text) '
+            f'SELECT id, text FROM "{Post._meta.db_table}" WHERE id > %s',
+            [after_id],
+        )
+        cursor.execute(f'INSERT INTO "{TABLE}" ("{TABLE}") VALUES (%s)',
+                       ['optimize'])
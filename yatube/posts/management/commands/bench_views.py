@@ -0,0 +1,127 @@
+import math
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from posts import comment_queue
+from posts.models import AuthorStats, Comment, Post, User
+
+
+def percentile(values, fraction):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет страницы лент через тестовый клиент и выводит '
+            'p50/p95 времени ответа и число SQL-запросов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом',
+        )
+        parser.add_argument(
+            '--page-cache', action='store_true',
+            help='Отдавать гостевые страницы из кэша страниц целиком',
+        )
+        parser.add_argument(
+            '--api', action='store_true',
+            help='Добавить JSON-версии страниц из API',
+        )
+        parser.add_argument(
+            '--reader',
+            help='Пользователь для ленты подписок (по умолчанию — '
+                 'подписанный на больше всего авторов)',
+        )
+
+    def handle(self, *args, **options):
+        targets = self.targets(options['reader'], options['page_cache'])
+        if options['api']:
+            for name, (client, url) in list(targets.items()):
+                match = resolve(url)
+                targets[f'{name}.json'] = (client, reverse(
+                    f'api:{match.url_name}', kwargs=match.kwargs
+                ))
+        header = f'{"страница":<18}{"p50, мс":>10}{"p95, мс":>10}' \
+                 f'{"max, мс":>10}{"запросов":>10}'
+        self.stdout.write(header)
+        for name, (client, url) in targets.items():
+            timings, queries = self.measure(
+                client, url, options['requests'], options['warmup'],
+                options['cold'],
+            )
+            self.stdout.write(
+                f'{name:<18}{percentile(timings, 0.5):>10.2f}'
+                f'{percentile(timings, 0.95):>10.2f}{max(timings):>10.2f}'
+                f'{percentile(queries, 0.5):>10}'
+            )
+
+    def targets(self, reader_name, page_cache):
+        post = Post.objects.order_by('-pub_date').first()
+        if post is None:
+            raise CommandError('База пуста: выполните seed_yatube')
+        busiest_group = Post.objects.filter(group__isnull=False).order_by(
+        ).values('group__slug').annotate(total=Count('pk')).order_by(
+            '-total').values_list('group__slug', flat=True).first()
+        busiest_author = AuthorStats.objects.order_by(
+            '-posts_count').values_list('author__username', flat=True).first()
+        discussed = Comment.objects.order_by().values('post').annotate(
+            total=Count('pk')).order_by('-total').values_list(
+            'post', flat=True).first() or post.pk
+        if reader_name:
+            reader = User.objects.filter(username=reader_name).first()
+            if reader is None:
+                raise CommandError(f'Пользователь {reader_name} не найден')
+        else:
+            reader = User.objects.filter(stats__isnull=False).order_by(
+                '-stats__following_count').first() or post.author
+        guest = Client()
+        if not page_cache:
+            # Иначе гость получает готовую страницу из кэша и замер не
+            # видит ни представления, ни его запросов. Cookie очереди
+            # комментариев, в отличие от sessionid, не добавляет запроса.
+            guest.cookies[comment_queue.PENDING_COOKIE] = 'bench'
+        member = Client()
+        member.force_login(reader)
+        targets = {
+            'index': (guest, reverse('posts:index')),
+            'profile': (guest, reverse(
+                'posts:profile', args=(busiest_author or post.author,))),
+            'post_detail': (guest, reverse(
+                'posts:post_detail', args=(discussed,))),
+            'follow_index': (member, reverse('posts:follow_index')),
+        }
+        if busiest_group:
+            targets['group_posts'] = (guest, reverse(
+                'posts:group_list', args=(busiest_group,)))
+        return targets
+
+    def measure(self, client, url, requests, warmup, cold):
+        for _ in range(warmup):
+            client.get(url)
+        timings = []
+        queries = []
+        for _ in range(requests):
+            if cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{url} ответил кодом {response.status_code}'
+                )
+            queries.append(len(context))
+        return timings, queries
@@ -0,0 +1,123 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+
+from posts.models import Comment, Follow, Post
+from posts.paginators import FEED_ORDERING, CursorPaginator
+from posts.seeding import seed_yatube
+
+FEED_INDEXES = (
+    'post_pub_date_idx',
+    'post_author_pub_date_idx',
+    'post_group_pub_date_idx',
+    'comment_post_created_idx',
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Показывает планы и время запросов лент; с --compare повторяет '
+            'замер без индексов лент в откатываемой транзакции')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed-posts', type=int, default=0,
+            help='Перед замером добавить столько синтетических постов',
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--compare', action='store_true')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Замер рассчитан на SQLite')
+        if options['seed_posts']:
+            self.stdout.write(f'Добавляю {options["seed_posts"]} постов...')
+            seed_yatube(
+                posts=options['seed_posts'],
+                comments=options['seed_posts'] // 10,
+                follows=options['seed_posts'] // 10,
+            )
+        queries = self.feed_queries()
+        if not queries:
+            raise CommandError('В базе нет постов для замера')
+        self.report('С индексами', queries, options['repeat'])
+        if options['compare']:
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        for name in FEED_INDEXES:
+                            cursor.execute(f'DROP INDEX IF EXISTS {name}')
+                    self.report('Без индексов', queries, options['repeat'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def feed_queries(self):
+        latest = Post.objects.order_by(*FEED_ORDERING).first()
+        if latest is None:
+            return {}
+        per_page = settings.POSTS_AMOUNT
+        feed = Post.objects.for_feed().order_by(*FEED_ORDERING)
+        total = Post.objects.count()
+        middle = Post.objects.order_by(*FEED_ORDERING).values_list(
+            'pub_date', 'id')[total // 2]
+        author = self.busiest(Post.objects.all(), 'author')
+        group = self.busiest(
+            Post.objects.filter(group__isnull=False), 'group'
+        )
+        commented = Comment.objects.order_by('-id').values_list(
+            'post', flat=True).first() or latest.pk
+        follow = Follow.objects.first()
+        return {
+            'index': feed[:per_page + 1],
+            'index_deep_cursor': feed.filter(
+                CursorPaginator(feed, per_page).beyond(middle)
+            )[:per_page + 1],
+            'index_deep_offset': feed[total // 2:total // 2 + per_page],
+            'profile': feed.filter(author=author)[:per_page + 1],
+            'group': feed.filter(group=group)[:per_page + 1],
+            'comments': Comment.objects.filter(post=commented).select_related(
+                'author').order_by('created'),
+            'follow_lookup': Follow.objects.filter(
+                user=follow.user_id if follow else latest.author_id,
+                author=follow.author_id if follow else latest.author_id,
+            )[:1],
+        }
+
+    @staticmethod
+    def busiest(queryset, field):
+        """Значение поля, у которого больше всего постов."""
+        return queryset.order_by().values(field).annotate(
+            total=Count('pk')).order_by('-total').values_list(
+            field, flat=True).first()
+
+    def report(self, title, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in queries.items():
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                # Комментарий делает текст запроса уникальным: иначе
+                # sqlite3 вернёт план из кэша подготовленных выражений,
+                # составленный ещё до удаления индексов.
+                cursor.execute(
+                    f'EXPLAIN QUERY PLAN {sql} -- {title}', params
+                )
+                plan = [row[-1] for row in cursor.fetchall()]
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f'{name}: медиана {statistics.median(timings):.2f} мс, '
+                f'минимум {min(timings):.2f} мс'
+            )
+            for line in plan:
+                self.stdout.write(f'    {line}')
@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import comment_queue
+
+
+class Command(BaseCommand):
+    help = 'Записывает в базу комментарии из очереди отложенной записи'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать отдельным писателем, разбирая очередь '
+                 'раз в COMMENT_QUEUE_FLUSH_INTERVAL секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            written = comment_queue.flush()
+            if written or not options['loop']:
+                self.stdout.write(f'Записано комментариев: {written}')
+            if not options['loop']:
+                return
+            time.sleep(settings.COMMENT_QUEUE_FLUSH_INTERVAL)
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит недостающие миниатюры картинок постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить миниатюры всех постов с картинками',
+        )
+        parser.add_argument(
+            '--sanitize', action='store_true',
+            help='Заодно пересохранить картинки без метаданных',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only(
+            'pk', 'image', 'thumbnails'
+        )
+        done = 0
+        for post in posts.iterator():
+            if options['all'] or thumbnails.is_stale(post):
+                thumbnails.generate(
+                    post.pk, post.image.name, options['sanitize']
+                )
+                done += 1
+        self.stdout.write(f'Обработано постов: {done}')
@@ -0,0 +1,51 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from posts import trending
+
+# Запас на транзакции, которые закоммитились позже своего времени.
+OVERLAP = datetime.timedelta(seconds=10)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг постов и групп для «Популярного»'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, пересчитывая только изменения',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.TRENDING_INTERVAL,
+            help='Пауза между пересчётами в секундах',
+        )
+        parser.add_argument(
+            '--full-every', type=int, default=60,
+            help='Каждый какой пересчёт делать полным: он учитывает '
+                 'удалённые комментарии',
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        runs = 0
+        while True:
+            started = timezone.now()
+            clock = time.perf_counter()
+            posts, groups = trending.rank(since=since, now=started)
+            self.stdout.write(
+                f'{"Полный" if since is None else "Частичный"} пересчёт: '
+                f'постов {posts}, групп {groups}, '
+                f'за {time.perf_counter() - clock:.2f} с'
+            )
+            if not options['loop']:
+                return
+            runs += 1
+            since = None if runs % options['full_every'] == 0 \
+                else started - OVERLAP
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import fulltext
+from posts.models import PostSearch
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fulltext.rebuild()
+        self.stdout.write(
+            f'Проиндексировано постов: {PostSearch.objects.count()}'
+        )
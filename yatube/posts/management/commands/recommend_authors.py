@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов для всех пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int,
+            help='Сколько авторов хранить на пользователя '
+                 '(по умолчанию RECOMMENDATIONS_TOP)',
+        )
+        parser.add_argument(
+            '--group-weight', type=float,
+            help='Вес общей группы (по умолчанию '
+                 'RECOMMENDATIONS_GROUP_WEIGHT)',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        users, stored = recommendations.rebuild(
+            top=options['top'],
+            group_weight=options['group_weight'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(
+            f'Пользователей: {users}, рекомендаций: {stored}, '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import stats
+from posts.models import Group, User
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов, подписок и комментариев '
+            'авторов и статистику групп')
+
+    def handle(self, *args, **options):
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            with transaction.atomic():
+                stats.recount(user_ids[start:start + BATCH_SIZE])
+        self.stdout.write(f'Пересчитана статистика авторов: {len(user_ids)}')
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+        for start in range(0, len(group_ids), BATCH_SIZE):
+            with transaction.atomic():
+                stats.recount_groups(group_ids[start:start + BATCH_SIZE])
+        self.stdout.write(f'Пересчитана статистика групп: {len(group_ids)}')
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails',
+            field=models.TextField(blank=True, editable=False, help_text='Готовые миниатюры картинки в JSON: адреса и размеры', verbose_name='Миниатюры'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='ingest_key',
+            field=models.CharField(editable=False, help_text='Защищает от повторной записи комментария из очереди', max_length=32, null=True, unique=True, verbose_name='Ключ очереди'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_authorrecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingGroup',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Group')),
+                ('score', models.FloatField(db_index=True, verbose_name='Оценка')),
+                ('posts_count', models.PositiveIntegerField(verbose_name='Постов в окне')),
+            ],
+            options={
+                'verbose_name': 'Популярная группа',
+                'verbose_name_plural': 'Популярные группы',
+                'ordering': ('-score',),
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post')),
+                ('pub_date', models.DateTimeField(db_index=True, verbose_name='Дата публикации поста')),
+                ('score', models.FloatField(db_index=True, help_text='log2 вовлечённости плюс время публикации в периодах полураспада: порядок как у затухающей вовлечённости', verbose_name='Оценка')),
+                ('comments_count', models.PositiveIntegerField(verbose_name='Комментариев')),
+                ('author_followers', models.PositiveIntegerField(help_text='С каким числом подписчиков посчитана оценка', verbose_name='Подписчиков автора')),
+                ('group', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group')),
+            ],
+            options={
+                'verbose_name': 'Популярный пост',
+                'verbose_name_plural': 'Популярные посты',
+                'ordering': ('-score', '-post_id'),
+            },
+        ),
+    ]
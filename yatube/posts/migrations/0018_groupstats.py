@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+    counts = dict(Post.objects.filter(group__isnull=False).order_by().values(
+        'group').annotate(total=Count('pk')).values_list('group', 'total'))
+    stats = []
+    for group_id in Group.objects.values_list('pk', flat=True):
+        last = Post.objects.filter(group_id=group_id).order_by(
+            '-pub_date', '-id').values_list('pk', 'pub_date').first()
+        stats.append(GroupStats(
+            group_id=group_id,
+            posts_count=counts.get(group_id, 0),
+            last_post_id=last[0] if last else None,
+            last_pub_date=last[1] if last else None,
+        ))
+    GroupStats.objects.bulk_create(stats, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('last_pub_date', models.DateTimeField(db_index=True, null=True, verbose_name='Дата последнего поста')),
+                ('last_post', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Post', verbose_name='Последний пост')),
+            ],
+            options={
+                'verbose_name': 'Статистика группы',
+                'verbose_name_plural': 'Статистика групп',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
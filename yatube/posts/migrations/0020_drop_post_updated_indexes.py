@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-17 07:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_feed_entry_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_group_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_author_updated_idx',
+        ),
+    ]
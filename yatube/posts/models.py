@@ -1,3 +1,5 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -13,6 +15,12 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты вместе с авторами и группами, выбранными одним запросом."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -22,6 +30,12 @@ class Post(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True,
+        help_text='Обновляется при каждом сохранении поста'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -42,15 +56,94 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnails = models.TextField(
+        'Миниатюры',
+        blank=True,
+        editable=False,
+        help_text='Готовые миниатюры картинки в JSON: адреса и размеры'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx',
+            ),
+        )
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self) -> str:
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Группа на момент загрузки: при переносе поста сигналы
+        # обновляют статистику и прежней группы.
+        instance.loaded_group_id = instance.__dict__.get('group_id')
+        return instance
+
+    def renditions(self):
+        """Сохранённые воркером миниатюры; битый JSON считается пустым."""
+        try:
+            renditions = json.loads(self.thumbnails or '{}')
+        except ValueError:
+            return {}
+        return renditions if isinstance(renditions, dict) else {}
+
+    def rendition(self, name):
+        """Миниатюра текущей картинки или None, пока её не сделали."""
+        renditions = self.renditions()
+        if not self.image or renditions.get('source') != self.image.name:
+            return None
+        return renditions.get(name)
+
+
+class SearchTextField(models.TextField):
+    """Колонка полнотекстового индекса SQLite FTS5."""
+
+
+@SearchTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class PostSearch(models.Model):
+    """Строка виртуальной таблицы FTS5 с текстом поста.
+
+    Таблицу создаёт миграция, а наполняют сигналы из ``posts.fulltext``.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry',
+    )
+    text = SearchTextField()
+
+    class Meta:
+        managed = False
+        db_table = 'posts_post_search'
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -71,6 +164,22 @@ class Comment(models.Model):
         'Дата публикации комментария',
         auto_now_add=True
     )
+    ingest_key = models.CharField(
+        'Ключ очереди',
+        max_length=32,
+        unique=True,
+        null=True,
+        editable=False,
+        help_text='Защищает от повторной записи комментария из очереди'
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('post', 'created'),
+                name='comment_post_created_idx',
+            ),
+        )
 
 
 class Follow(models.Model):
@@ -84,3 +193,180 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following',
     )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        )
+
+
+class AuthorRecommendation(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    score = models.FloatField('Оценка')
+    co_follows = models.PositiveIntegerField(
+        'Общих читателей',
+        help_text='Сколько авторов из подписок пользователя читают автора'
+    )
+    shared_groups = models.PositiveIntegerField(
+        'Общих групп',
+        help_text='В скольких группах пользователя пишет автор'
+    )
+
+    class Meta:
+        ordering = ('-score', 'author')
+        indexes = (
+            models.Index(
+                fields=('user', '-score'),
+                name='recommendation_user_score_idx',
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_recommendation',
+            ),
+        )
+        verbose_name = 'Рекомендация автора'
+        verbose_name_plural = 'Рекомендации авторов'
+
+
+class TrendingPost(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+    )
+    group = models.ForeignKey(
+        Group,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField('Дата публикации поста', db_index=True)
+    score = models.FloatField(
+        'Оценка',
+        db_index=True,
+        help_text='log2 вовлечённости плюс время публикации в периодах '
+                  'полураспада: порядок как у затухающей вовлечённости'
+    )
+    comments_count = models.PositiveIntegerField('Комментариев')
+    author_followers = models.PositiveIntegerField(
+        'Подписчиков автора',
+        help_text='С каким числом подписчиков посчитана оценка'
+    )
+
+    class Meta:
+        ordering = ('-score', '-post_id')
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
+
+
+class TrendingGroup(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+    )
+    score = models.FloatField('Оценка', db_index=True)
+    posts_count = models.PositiveIntegerField('Постов в окне')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Популярная группа'
+        verbose_name_plural = 'Популярные группы'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='feed_user_pub_date_idx',
+            ),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_feed_entry',
+            ),
+        )
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи ленты подписок'
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    comments_count = models.PositiveIntegerField('Комментариев', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self) -> str:
+        return f'Статистика {self.author_id}'
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    last_post = models.ForeignKey(
+        Post,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Последний пост'
+    )
+    last_pub_date = models.DateTimeField(
+        'Дата последнего поста',
+        null=True,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+    def __str__(self) -> str:
+        return f'Статистика группы {self.group_id}'
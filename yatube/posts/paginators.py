@@ -0,0 +1,150 @@
+import base64
+import binascii
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+NEXT = 'n'
+PREVIOUS = 'p'
+FEED_ORDERING = ('-pub_date', '-id')
+COMMENT_ORDERINGS = {
+    'oldest': ('created', 'id'),
+    'newest': ('-created', '-id'),
+}
+
+
+def encode_cursor(direction, values):
+    """Упаковывает направление и ключ записи в непрозрачный токен."""
+    payload = [direction] + [
+        value.isoformat() if isinstance(value, datetime.datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора; для битого токена возвращает None."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, *values = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        return None
+    if direction not in (NEXT, PREVIOUS):
+        return None
+    return direction, values
+
+
+class CursorPaginator(Paginator):
+    """Keyset-паджинация по паре полей без COUNT(*) и OFFSET.
+
+    Оба поля ``ordering`` должны быть отсортированы в одном направлении,
+    последнее поле обязано быть уникальным. Паджинатор обслуживает одну
+    страницу: курсоры соседних страниц хранятся в нём самом, а номер
+    страницы условный — известно лишь, есть ли соседи.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, ordering=FEED_ORDERING):
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+        self.descending = ordering[0].startswith('-')
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def cursor_for(self, obj, direction):
+        # Строки values() — словари, остальное — экземпляры моделей.
+        if isinstance(obj, dict):
+            values = [obj[name] for name in self.fields]
+        else:
+            values = [getattr(obj, name) for name in self.fields]
+        return encode_cursor(direction, values)
+
+    def page(self, cursor=None):
+        position = self._decode(cursor)
+        queryset = self.object_list
+        backwards = position is not None and position[0] == PREVIOUS
+        if position is not None:
+            queryset = queryset.filter(
+                self.beyond(position[1], self.descending != backwards)
+            )
+        if backwards:
+            queryset = queryset.reverse()
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if backwards:
+            items.reverse()
+            has_next, has_previous = bool(items), has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        if has_next:
+            self.next_cursor = self.cursor_for(items[-1], NEXT)
+        if has_previous:
+            self.previous_cursor = self.cursor_for(items[0], PREVIOUS)
+        number = 2 if has_previous else 1
+        self.num_pages = number + 1 if has_next else number
+        return self._get_page(items, number, self)
+
+    def get_page(self, cursor=None):
+        return self.page(cursor)
+
+    def _decode(self, cursor):
+        position = decode_cursor(cursor)
+        if position is None or len(position[1]) != len(self.fields):
+            return None
+        model = self.object_list.model
+        values = []
+        for name, value in zip(self.fields, position[1]):
+            try:
+                value = model._meta.get_field(name).to_python(value)
+            except FieldDoesNotExist:
+                pass
+            except ValidationError:
+                return None
+            if value is None:
+                return None
+            values.append(value)
+        return position[0], values
+
+    def beyond(self, values, lower=True):
+        """Условие «строго после ключа» для лексикографического порядка.
+
+        Отдельное нестрогое ограничение по первому полю позволяет базе
+        начать просмотр индекса сразу с нужного места.
+        """
+        lookup = 'lt' if lower else 'gt'
+        condition = Q()
+        for index, name in enumerate(self.fields):
+            prefix = dict(zip(self.fields[:index], values[:index]))
+            prefix[f'{name}__{lookup}'] = values[index]
+            condition |= Q(**prefix)
+        return Q(**{f'{self.fields[0]}__{lookup}e': values[0]}) & condition
+
+
+def paginate(request, queryset, count=None, ordering=FEED_ORDERING):
+    """Возвращает страницу ленты по курсору.
+
+    Ссылки вида ``?page=N`` из старых закладок обслуживаются обычным
+    постраничным паджинатором с тем же порядком записей. Заранее
+    известное число записей ``count`` избавляет его от COUNT(*).
+    """
+    if 'page' in request.GET and 'cursor' not in request.GET:
+        paginator = Paginator(
+            queryset.order_by(*ordering), settings.POSTS_AMOUNT
+        )
+        if count is not None:
+            paginator.count = count
+        return paginator.get_page(request.GET.get('page'))
+    paginator = CursorPaginator(
+        queryset, settings.POSTS_AMOUNT, ordering=ordering
+    )
+    return paginator.page(request.GET.get('cursor'))
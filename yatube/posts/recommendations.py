@@ -0,0 +1,108 @@
+import heapq
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import AuthorRecommendation, Follow, Post, User
+
+EMPTY = frozenset()
+
+
+def load_following():
+    """Все подписки одним проходом: пользователь -> множество авторов."""
+    following = defaultdict(set)
+    rows = Follow.objects.values_list('user_id', 'author_id')
+    for user_id, author_id in rows.iterator():
+        following[user_id].add(author_id)
+    return following
+
+
+def load_author_groups():
+    """Группы, в которых писал каждый автор."""
+    groups = defaultdict(set)
+    rows = Post.objects.filter(group__isnull=False).values_list(
+        'author_id', 'group_id').distinct()
+    for author_id, group_id in rows.iterator():
+        groups[author_id].add(group_id)
+    return groups
+
+
+def recommend(user_id, following, author_groups, top, group_weight):
+    """Лучшие ``top`` авторов для пользователя.
+
+    Кандидаты — авторы, которых читают его подписки; оценка — число
+    таких подписок плюс ``group_weight`` за каждую общую группу с теми,
+    кого пользователь читает или где пишет сам. Возвращает кортежи
+    ``(оценка, подписок, групп, автор)`` по убыванию оценки.
+    """
+    followed = following.get(user_id, EMPTY)
+    co_follows = Counter()
+    for author_id in followed:
+        co_follows.update(following.get(author_id, EMPTY))
+    if not co_follows:
+        return []
+    interests = set(author_groups.get(user_id, EMPTY))
+    for author_id in followed:
+        interests |= author_groups.get(author_id, EMPTY)
+    candidates = (
+        (author_id, count, len(author_groups.get(author_id, EMPTY)
+                               & interests))
+        for author_id, count in co_follows.items()
+        if author_id != user_id and author_id not in followed
+    )
+    best = heapq.nlargest(
+        top,
+        ((count + group_weight * shared, count, shared, -author_id)
+         for author_id, count, shared in candidates),
+    )
+    return [(score, count, shared, -author_id)
+            for score, count, shared, author_id in best]
+
+
+def _store(user_ids, rows):
+    with transaction.atomic():
+        AuthorRecommendation.objects.filter(user_id__in=user_ids).delete()
+        AuthorRecommendation.objects.bulk_create(rows)
+
+
+def rebuild(top=None, group_weight=None, batch_size=500):
+    """Пересчитывает рекомендации всех пользователей.
+
+    Граф подписок и группы авторов читаются из базы по разу, дальше
+    всё считается в памяти. Записи заменяются пачками по
+    ``batch_size`` пользователей, каждая в своей транзакции, так что
+    читатели видят либо старые, либо новые рекомендации пользователя.
+    Возвращает число пользователей и сохранённых рекомендаций.
+    """
+    if top is None:
+        top = settings.RECOMMENDATIONS_TOP
+    if group_weight is None:
+        group_weight = settings.RECOMMENDATIONS_GROUP_WEIGHT
+    following = load_following()
+    author_groups = load_author_groups()
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    stored = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        rows = [
+            AuthorRecommendation(
+                user_id=user_id, author_id=author_id, score=score,
+                co_follows=count, shared_groups=shared,
+            )
+            for user_id in batch
+            for score, count, shared, author_id in recommend(
+                user_id, following, author_groups, top, group_weight
+            )
+        ]
+        _store(batch, rows)
+        stored += len(rows)
+    return len(user_ids), stored
+
+
+def for_user(user_id, limit=None):
+    """Сохранённые рекомендации пользователя вместе с авторами."""
+    if limit is None:
+        limit = settings.RECOMMENDATIONS_SHOWN
+    return list(AuthorRecommendation.objects.filter(
+        user_id=user_id).select_related('author')[:limit])
@@ -0,0 +1,217 @@
+import datetime
+import itertools
+import os
+import random
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from . import cache, fulltext, stats
+from .models import Comment, FeedEntry, Follow, Group, Post, User
+
+BATCH_SIZE = 10000
+TEXTS_POOL_SIZE = 500
+IMAGE_SIZE = (1280, 720)
+
+
+def _insert(model, columns, rows):
+    table = connection.ops.quote_name(model._meta.db_table)
+    names = ', '.join(
+        connection.ops.quote_name(model._meta.get_field(name).column)
+        for name in columns
+    )
+    placeholders = ', '.join(['%s'] * len(columns))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} ({names}) VALUES ({placeholders})', rows
+        )
+
+
+def _insert_batches(model, columns, rows):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, BATCH_SIZE))
+        if not batch:
+            return
+        with transaction.atomic():
+            _insert(model, columns, batch)
+
+
+def _power_law(population, skew, rng):
+    """Выбор с весом 1 / rank ** skew: немногие элементы популярны."""
+    ranked = list(population)
+    rng.shuffle(ranked)
+    weights = list(itertools.accumulate(
+        1 / (rank ** skew) for rank in range(1, len(ranked) + 1)
+    ))
+
+    def choose(count):
+        return rng.choices(ranked, cum_weights=weights, k=count)
+
+    return choose
+
+
+def _make_images(count, prefix, rng):
+    directory = os.path.join(settings.MEDIA_ROOT, 'posts')
+    os.makedirs(directory, exist_ok=True)
+    names = []
+    for number in range(count):
+        name = f'posts/{prefix}_{number}.jpg'
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new('RGB', IMAGE_SIZE, color).save(
+            os.path.join(settings.MEDIA_ROOT, name), quality=85
+        )
+        names.append(name)
+    return names
+
+
+def seed_yatube(users=1000, groups=20, posts=10000, comments=20000,
+                follows=10000, images=0, image_ratio=0.2, skew=1.1,
+                days=365, seed=None, log=None):
+    """Наполняет базу синтетическими данными с реалистичным перекосом.
+
+    Авторство постов, популярность авторов у подписчиков и обсуждаемость
+    постов распределены по степенному закону. Строки вставляются пачками
+    в обход моделей, после чего одним проходом строятся ленты подписок,
+    пересчитывается статистика авторов и сбрасывается кэш лент.
+    """
+    log = log or (lambda message: None)
+    rng = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    prefix = f'seed{rng.randrange(10 ** 6)}'
+    now = timezone.now()
+
+    log(f'Пользователи: {users}')
+    password = make_password(None)
+    User.objects.bulk_create(
+        User(
+            username=f'{prefix}_{number}',
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+            password=password,
+        )
+        for number in range(users)
+    )
+    user_ids = list(User.objects.filter(
+        username__startswith=f'{prefix}_').values_list('pk', flat=True))
+
+    log(f'Группы: {groups}')
+    Group.objects.bulk_create(
+        Group(
+            title=fake.catch_phrase()[:200],
+            slug=f'{prefix}-{number}',
+            description=fake.paragraph(),
+        )
+        for number in range(groups)
+    )
+    group_ids = list(Group.objects.filter(
+        slug__startswith=f'{prefix}-').values_list('pk', flat=True))
+
+    log(f'Посты: {posts}')
+    texts = [fake.paragraph(nb_sentences=5) for _ in range(TEXTS_POOL_SIZE)]
+    pictures = _make_images(images, prefix, rng)
+    pick_author = _power_law(user_ids, skew, rng)
+    start = now - datetime.timedelta(days=days)
+    step = datetime.timedelta(days=days) / max(posts, 1)
+
+    def post_rows():
+        for number, author_id in enumerate(pick_author(posts)):
+            image = ''
+            if pictures and rng.random() < image_ratio:
+                image = rng.choice(pictures)
+            pub_date = start + step * number
+            yield (
+                rng.choice(texts),
+                pub_date,
+                pub_date,
+                author_id,
+                rng.choice(group_ids)
+                if group_ids and rng.random() < 0.5 else None,
+                image,
+                '',
+            )
+
+    last_post_id = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+    _insert_batches(
+        Post,
+        ('text', 'pub_date', 'updated', 'author', 'group', 'image',
+         'thumbnails'),
+        post_rows(),
+    )
+    seeded_posts = list(Post.objects.filter(
+        author__username__startswith=f'{prefix}_').values_list(
+        'pk', 'pub_date'))
+
+    if seeded_posts and comments:
+        log(f'Комментарии: {comments}')
+        pick_post = _power_law(seeded_posts, skew, rng)
+        pick_commentator = _power_law(user_ids, skew, rng)
+
+        def comment_rows():
+            for (post_id, pub_date), author_id in zip(
+                pick_post(comments), pick_commentator(comments)
+            ):
+                yield (
+                    post_id,
+                    author_id,
+                    rng.choice(texts)[:200],
+                    pub_date + (now - pub_date) * rng.random(),
+                )
+
+        _insert_batches(
+            Comment, ('post', 'author', 'text', 'created'), comment_rows()
+        )
+
+    log(f'Подписки: до {follows}')
+    pick_followed = _power_law(user_ids, skew, rng)
+    edges = set()
+    for _ in range(10):
+        missing = follows - len(edges)
+        if missing <= 0:
+            break
+        edges.update(
+            (rng.choice(user_ids), author_id)
+            for author_id in pick_followed(missing)
+        )
+        edges = {(user, author) for user, author in edges if user != author}
+    edges = list(edges)[:follows]
+    last_follow_id = Follow.objects.aggregate(last=Max('pk'))['last'] or 0
+    _insert_batches(Follow, ('user', 'author'), edges)
+
+    log('Ленты подписок, поисковый индекс, статистика авторов и групп')
+    feed_table, follow_table, post_table = (
+        connection.ops.quote_name(model._meta.db_table)
+        for model in (FeedEntry, Follow, Post)
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {feed_table} (user_id, post_id, pub_date) '
+            f'SELECT f.user_id, p.id, p.pub_date FROM {follow_table} f '
+            f'JOIN {post_table} p ON p.author_id = f.author_id '
+            f'WHERE f.id > %s',
+            [last_follow_id],
+        )
+    with transaction.atomic():
+        fulltext.rebuild(after_id=last_post_id)
+    for start_index in range(0, len(user_ids), stats.BATCH_SIZE):
+        with transaction.atomic():
+            stats.recount(
+                user_ids[start_index:start_index + stats.BATCH_SIZE]
+            )
+    with transaction.atomic():
+        stats.recount_groups(group_ids)
+    cache.invalidate_feeds()
+    return {
+        'users': len(user_ids),
+        'groups': len(group_ids),
+        'posts': len(seeded_posts),
+        'comments': comments if seeded_posts else 0,
+        'follows': len(edges),
+        'images': len(pictures),
+    }
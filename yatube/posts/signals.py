@@ -0,0 +1,149 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import (cache, comment_queue, feeds, follow_graph, fulltext, stats,
+               thumbnails)
+from .models import (AuthorRecommendation, AuthorStats, Comment, Follow,
+                     Group, GroupStats, Post, User)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        feeds.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_cache(sender, instance, **kwargs):
+    # После фиксации: иначе параллельный запрос успеет закэшировать старую
+    # ленту уже под новым поколением.
+    post_id, username = instance.pk, instance.author.username
+
+    def invalidate():
+        cache.invalidate_post(post_id)
+        cache.purge_profile_pages(username)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Post)
+def render_thumbnails(sender, instance, raw=False, **kwargs):
+    if not raw and thumbnails.is_stale(instance):
+        thumbnails.schedule(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, **kwargs):
+    fulltext.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post_text(sender, instance, **kwargs):
+    fulltext.remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def fill_follow_feed(sender, instance, created, **kwargs):
+    if created:
+        feeds.add_author(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def drop_followed_recommendation(sender, instance, created, **kwargs):
+    # Остальные рекомендации доживут до следующего recommend_authors.
+    if created:
+        AuthorRecommendation.objects.filter(
+            user_id=instance.user_id, author_id=instance.author_id
+        ).delete()
+
+
+@receiver(post_save, sender=Follow)
+def invalidate_follows_cache(sender, instance, created, **kwargs):
+    user, author = instance.user, instance.author
+    transaction.on_commit(lambda: cache.invalidate_follow(user, author))
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follow(sender, instance, **kwargs):
+    # follow_graph.unfollow удаляет подписку мимо сигнала и делает то же.
+    follow_graph.unfollowed(instance.user, instance.author)
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.create(author=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        stats.shift(instance.author_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    stats.shift(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        GroupStats.objects.create(group=instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    cache.invalidate_feeds()
+
+
+@receiver(post_save, sender=Post)
+def count_group_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else getattr(
+        instance, 'loaded_group_id', instance.group_id
+    )
+    if previous != instance.group_id:
+        if previous is not None:
+            stats.remove_group_post(previous, instance.pk)
+        if instance.group_id is not None:
+            stats.add_group_post(instance)
+    instance.loaded_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_group_post(sender, instance, **kwargs):
+    if instance.group_id is not None:
+        stats.remove_group_post(instance.group_id, instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        stats.shift(instance.author_id, followers_count=1)
+        stats.shift(instance.user_id, following_count=1)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, **kwargs):
+    if created:
+        comment_queue.comments_added([instance])
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    stats.shift(instance.author_id, comments_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments_cache(sender, instance, created=False, **kwargs):
+    if created:
+        # Новый комментарий уже учла comment_queue.comments_added.
+        return
+    post_id = instance.post_id
+    transaction.on_commit(lambda: cache.invalidate_comments(post_id))
@@ -0,0 +1,129 @@
+from django.db.models import Count, F, Q
+
+from .models import AuthorStats, Comment, Follow, GroupStats, Post
+
+BATCH_SIZE = 500
+COUNTERS = {
+    'posts_count': (Post, 'author'),
+    'followers_count': (Follow, 'author'),
+    'following_count': (Follow, 'user'),
+    'comments_count': (Comment, 'author'),
+}
+
+
+def shift(user_id, **deltas):
+    """Сдвигает счётчики автора одним UPDATE.
+
+    Если записи статистики ещё нет, ничего не делает: она будет посчитана
+    целиком при первом чтении. Счётчик не уходит в минус — такое
+    расхождение исправляет команда recount.
+    """
+    guards = {
+        f'{name}__gte': -delta for name, delta in deltas.items() if delta < 0
+    }
+    AuthorStats.objects.filter(author_id=user_id, **guards).update(**{
+        name: F(name) + delta for name, delta in deltas.items()
+    })
+
+
+def recount(user_ids):
+    """Пересчитывает статистику указанных пользователей по таблицам."""
+    user_ids = list(user_ids)
+    stats = {
+        user_id: AuthorStats(author_id=user_id) for user_id in user_ids
+    }
+    for name, (model, field) in COUNTERS.items():
+        rows = model.objects.filter(**{f'{field}__in': user_ids}).order_by(
+        ).values(field).annotate(total=Count('pk')).values_list(
+            field, 'total')
+        for user_id, total in rows:
+            setattr(stats[user_id], name, total)
+    existing = set(AuthorStats.objects.filter(
+        author_id__in=user_ids).values_list('author_id', flat=True))
+    AuthorStats.objects.bulk_create(
+        [item for user_id, item in stats.items() if user_id not in existing],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    AuthorStats.objects.bulk_update(
+        [item for user_id, item in stats.items() if user_id in existing],
+        list(COUNTERS),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def for_author(author):
+    """Статистика автора; отсутствующая запись создаётся пересчётом."""
+    try:
+        return AuthorStats.objects.get(author=author)
+    except AuthorStats.DoesNotExist:
+        recount([author.pk])
+        return AuthorStats.objects.get(author=author)
+
+
+def _latest_group_post(group_id):
+    return Post.objects.filter(group_id=group_id).order_by(
+        '-pub_date', '-id').values_list('pk', 'pub_date').first()
+
+
+def add_group_post(post):
+    """Учитывает пост в статистике его группы двумя UPDATE."""
+    GroupStats.objects.filter(group_id=post.group_id).update(
+        posts_count=F('posts_count') + 1
+    )
+    GroupStats.objects.filter(
+        Q(last_pub_date__isnull=True) | Q(last_pub_date__lte=post.pub_date),
+        group_id=post.group_id,
+    ).update(last_post=post, last_pub_date=post.pub_date)
+
+
+def remove_group_post(group_id, post_id):
+    """Убирает пост из статистики группы.
+
+    Если это был последний пост группы, его место занимает предыдущий:
+    один запрос по индексу постов группы.
+    """
+    GroupStats.objects.filter(group_id=group_id, posts_count__gte=1).update(
+        posts_count=F('posts_count') - 1
+    )
+    lost_last = GroupStats.objects.filter(
+        Q(last_post_id=post_id) | Q(last_post__isnull=True),
+        group_id=group_id,
+    )
+    if lost_last.exists():
+        latest = _latest_group_post(group_id)
+        lost_last.update(
+            last_post_id=latest[0] if latest else None,
+            last_pub_date=latest[1] if latest else None,
+        )
+
+
+def recount_groups(group_ids):
+    """Пересчитывает статистику указанных групп по таблице постов."""
+    group_ids = list(group_ids)
+    counts = dict(Post.objects.filter(group__in=group_ids).order_by(
+    ).values('group').annotate(total=Count('pk')).values_list(
+        'group', 'total'))
+    stats = []
+    for group_id in group_ids:
+        latest = _latest_group_post(group_id)
+        stats.append(GroupStats(
+            group_id=group_id,
+            posts_count=counts.get(group_id, 0),
+            last_post_id=latest[0] if latest else None,
+            last_pub_date=latest[1] if latest else None,
+        ))
+    GroupStats.objects.filter(group_id__in=group_ids).delete()
+    GroupStats.objects.bulk_create(stats, batch_size=BATCH_SIZE)
+
+
+def for_group(group):
+    """Статистика группы; отсутствующая запись создаётся пересчётом.
+
+    Если группа выбрана с ``select_related('stats')``, запроса нет.
+    """
+    try:
+        return group.stats
+    except GroupStats.DoesNotExist:
+        recount_groups([group.pk])
+        return GroupStats.objects.get(group=group)
@@ -0,0 +1,11 @@
+from django import template
+
+from posts import recommendations
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/recommendations.html')
+def recommended_authors(user):
+    """Готовые рекомендации из таблицы: один запрос по индексу."""
+    return {'recommendations': recommendations.for_user(user.pk)}
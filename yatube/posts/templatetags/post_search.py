@@ -0,0 +1,17 @@
+from django import template
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+
+from posts.fulltext import HIGHLIGHT_END, HIGHLIGHT_START
+
+register = template.Library()
+
+
+@register.filter
+def highlight(snippet):
+    """Экранирует фрагмент поста и выделяет найденные слова тегом mark."""
+    escaped = conditional_escape(snippet)
+    return mark_safe(
+        escaped.replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_END, '</mark>')
+    )
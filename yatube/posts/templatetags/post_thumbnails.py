@@ -0,0 +1,15 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_thumbnail(post, name='card'):
+    """Готовая миниатюра поста или размеры заглушки без адреса.
+
+    Картинка никогда не масштабируется во время запроса: этим заняты
+    воркеры из ``posts.thumbnails``.
+    """
+    return post.rendition(name) or thumbnails.placeholder(name)
@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from posts import comment_queue
+from posts.models import AuthorStats, Comment, Post, User
+from posts.tests.utils import run_on_commit
+
+QUEUE_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    COMMENT_QUEUE_ENABLED=True,
+    COMMENT_QUEUE_WRITER=False,
+    COMMENT_QUEUE_DIR=QUEUE_DIR,
+)
+class CommentQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.reader = User.objects.create(username='Reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(QUEUE_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+        self.detail = reverse('posts:post_detail', args=(self.post.pk,))
+
+    def tearDown(self):
+        comment_queue.flush()
+
+    def comment(self, text, post_id=None):
+        return self.client.post(
+            reverse('posts:add_comment', args=(post_id or self.post.pk,)),
+            {'text': text},
+        )
+
+    def test_comment_is_queued_without_writes(self):
+        """Комментарий уходит в очередь, база только проверяет пост"""
+        with self.assertNumQueries(3):
+            response = self.comment('В очередь')
+        self.assertRedirects(response, self.detail)
+        self.assertFalse(Comment.objects.exists())
+        call_command('flush_comments', stdout=StringIO())
+        self.assertTrue(Comment.objects.filter(text='В очередь').exists())
+
+    def test_missing_post_is_not_queued(self):
+        """Комментарий к несуществующему посту не ставится в очередь"""
+        response = self.comment('В никуда', post_id=10 ** 6)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(comment_queue.flush(), 0)
+
+    def test_created_is_enqueue_time(self):
+        """Время комментария — момент постановки в очередь, не записи"""
+        queued = timezone.now() - timedelta(minutes=5)
+        with mock.patch.object(timezone, 'now', return_value=queued):
+            self.comment('Из прошлого')
+        comment_queue.flush()
+        self.assertEqual(
+            Comment.objects.get(text='Из прошлого').created, queued
+        )
+
+    def test_author_reads_own_pending_comment(self):
+        """Автор сразу видит свой комментарий, остальные — после записи"""
+        self.comment('Мой комментарий')
+        response = self.client.get(self.detail)
+        self.assertContains(response, 'Комментарий публикуется')
+        self.assertContains(response, 'Мой комментарий')
+        self.client.logout()
+        self.assertNotContains(self.client.get(self.detail), 'Мой коммент')
+        with run_on_commit():
+            comment_queue.flush()
+        self.assertContains(self.client.get(self.detail), 'Мой комментарий')
+
+    def test_flush_writes_batches_once(self):
+        """Пачки пишутся без дублей, сигналы обновляют счётчики"""
+        with override_settings(COMMENT_QUEUE_BATCH_SIZE=2):
+            for number in range(5):
+                self.comment(f'Комментарий {number}')
+            # Пост удалили, пока комментарий ждал в очереди.
+            comment_queue.enqueue(10 ** 6, self.reader.pk, 'К удалённому')
+            self.assertEqual(comment_queue.flush(), 5)
+        self.assertEqual(Comment.objects.count(), 5)
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.reader).comments_count, 5
+        )
+        self.assertEqual(comment_queue.flush(), 0)
+        self.assertFalse(os.listdir(QUEUE_DIR) and any(
+            name.startswith('batch-') for name in os.listdir(QUEUE_DIR)
+        ))
+
+    def test_batch_queries_do_not_grow_with_size(self):
+        """Пачка пишется одним набором запросов, а не по строке"""
+        queries = []
+        for size in (2, 20):
+            for number in range(size):
+                comment_queue.enqueue(
+                    self.post.pk, self.reader.pk, f'Комментарий {number}'
+                )
+            with CaptureQueriesContext(connection) as context:
+                with run_on_commit():
+                    self.assertEqual(comment_queue.flush(), size)
+            queries.append(len(context))
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.reader).comments_count, 22
+        )
+
+    def test_replayed_batch_has_no_duplicates(self):
+        """Повтор пачки после сбоя не создаёт дублей"""
+        entry = comment_queue.enqueue(self.post.pk, self.reader.pk, 'Один')
+        comment_queue.flush()
+        comment_queue._write([entry])
+        self.assertEqual(Comment.objects.filter(text='Один').count(), 1)
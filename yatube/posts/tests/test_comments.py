@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Post, User
+
+from .utils import QueryBudgetMixin, run_on_commit
+
+
+@override_settings(COMMENTS_AMOUNT=5)
+class CommentsPageTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        for number in range(12):
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'Комментарий {number}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:post_detail', args=(self.post.pk,))
+
+    def texts(self, response):
+        return [comment.text for comment in response.context['comments']]
+
+    def test_comments_are_paginated_both_ways(self):
+        """Комментарии выводятся страницами от старых или от новых"""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            self.texts(response), [f'Комментарий {n}' for n in range(5)]
+        )
+        response = self.client.get(self.url, {'order': 'newest'})
+        self.assertEqual(
+            self.texts(response),
+            [f'Комментарий {n}' for n in range(11, 6, -1)],
+        )
+        cursor = response.context['comments'].paginator.next_cursor
+        response = self.client.get(
+            self.url, {'order': 'newest', 'cursor': cursor}
+        )
+        self.assertEqual(
+            self.texts(response),
+            [f'Комментарий {n}' for n in range(6, 1, -1)],
+        )
+        self.assertContains(response, '?order=newest&amp;cursor=')
+
+    def test_cached_fragment_skips_comment_query(self):
+        """Закэшированный список не читает комментарии из базы"""
+        self.client.get(self.url)
+        # Пост и статистика автора.
+        with self.assertMaxQueries(2):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Комментарий 4')
+
+    def test_new_comment_invalidates_fragment(self):
+        """Новый комментарий сбрасывает закэшированный список"""
+        self.client.force_login(self.author)
+        response = self.client.get(self.url, {'order': 'newest'})
+        self.assertNotContains(response, 'Свежий')
+        with run_on_commit():
+            self.client.post(
+                reverse('posts:add_comment', args=(self.post.pk,)),
+                {'text': 'Свежий комментарий'},
+            )
+        response = self.client.get(self.url, {'order': 'newest'})
+        self.assertContains(response, 'Свежий комментарий')
@@ -0,0 +1,134 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import follow_graph
+from posts.models import Comment, Follow, Group, Post, User
+from posts.tests.utils import run_on_commit
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.reader = User.objects.create(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+
+    def revalidate(self, url, response, client=None):
+        return (client or self.client).get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+
+    def test_unchanged_pages_return_304(self):
+        """Неизменившаяся страница отдаётся ответом 304"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 304
+                )
+
+    def test_new_post_changes_validators(self):
+        """Новый пост обновляет ETag лент"""
+        responses = {url: self.client.get(url) for url in self.urls[:2]}
+        with run_on_commit():
+            Post.objects.create(author=self.author, text='Новый пост')
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 200
+                )
+
+    def test_edit_changes_post_etag(self):
+        """Правка поста меняет ETag его страницы"""
+        url = self.urls[2]
+        response = self.client.get(url)
+        self.client.force_login(self.author)
+        with run_on_commit():
+            self.client.post(
+                reverse('posts:post_edit', args=(self.post.pk,)),
+                {'text': 'Исправленный пост'},
+            )
+        response = self.revalidate(url, response, Client())
+        self.assertContains(response, 'Исправленный пост')
+
+    def test_delete_changes_feed_etags(self):
+        """Удаление поста меняет ETag лент, хотя новых правок нет"""
+        post = Post.objects.create(author=self.author, text='Удалённый')
+        responses = {url: self.client.get(url) for url in self.urls[:2]}
+        with run_on_commit():
+            post.delete()
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                response = self.revalidate(url, response)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotContains(response, 'Удалённый')
+
+    def test_new_comment_changes_post_validators(self):
+        """Новый комментарий обновляет ETag страницы поста"""
+        url = self.urls[2]
+        response = self.client.get(url)
+        with run_on_commit():
+            Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий'
+            )
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_etag_differs_between_users(self):
+        """ETag гостя не подходит вошедшему пользователю"""
+        url = self.urls[0]
+        response = self.client.get(url)
+        self.assertEqual(
+            self.revalidate(url, response, self.reader_client).status_code,
+            200,
+        )
+
+    def test_follow_changes_profile_validators(self):
+        """Подписка меняет ETag профиля, группы и ленты подписок"""
+        group_url = reverse('posts:group_list', args=(self.group.slug,))
+        for url in (self.urls[1], reverse('posts:follow_index'), group_url):
+            with self.subTest(url=url):
+                self.reader_client.get(url)
+                response = self.reader_client.get(url)
+                with run_on_commit():
+                    follow_graph.follow(self.reader, self.author)
+                self.assertEqual(
+                    self.revalidate(
+                        url, response, self.reader_client
+                    ).status_code,
+                    200,
+                )
+                with run_on_commit():
+                    Follow.objects.filter(user=self.reader).delete()
+
+    def test_third_user_follow_changes_profile_etag(self):
+        """Чужая подписка на автора меняет ETag его профиля"""
+        url = self.urls[1]
+        self.reader_client.get(url)
+        response = self.reader_client.get(url)
+        self.assertEqual(
+            self.revalidate(url, response, self.reader_client).status_code,
+            304,
+        )
+        other = User.objects.create(username='Other')
+        with run_on_commit():
+            follow_graph.follow(other, self.author)
+        self.assertEqual(
+            self.revalidate(url, response, self.reader_client).status_code,
+            200,
+        )
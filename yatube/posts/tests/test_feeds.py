@@ -0,0 +1,48 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from posts.models import FeedEntry, Follow, Post, User
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='Reader')
+        cls.author = User.objects.create(username='Author')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Пост до подписки',
+        )
+
+    def feed_post_ids(self):
+        return set(FeedEntry.objects.filter(
+            user=self.reader
+        ).values_list('post_id', flat=True))
+
+    def test_follow_fills_feed_with_author_posts(self):
+        """После подписки в ленту попадают прежние посты автора"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed_post_ids(), {self.old_post.pk})
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        """Новый пост автора раскладывается по лентам подписчиков"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.feed_post_ids(),
+                         {self.old_post.pk, new_post.pk})
+
+    def test_unfollow_prunes_feed(self):
+        """После отписки посты автора пропадают из ленты"""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        follow.delete()
+        self.assertEqual(self.feed_post_ids(), set())
+
+    def test_rebuild_command_restores_feed(self):
+        """Команда rebuild_follow_feeds восстанавливает потерянные записи"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_follow_feeds', self.reader.username,
+                     stdout=StringIO())
+        self.assertEqual(self.feed_post_ids(), {self.old_post.pk})
@@ -0,0 +1,221 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts import follow_graph
+from posts.models import AuthorStats, Follow, Group, Post, User
+from posts.tests.utils import run_on_commit
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [
+            User.objects.create(username=f'user{number}')
+            for number in range(6)
+        ]
+        cls.me, cls.ann, cls.bob, cls.eve, cls.max, cls.kim = cls.users
+        for user, author in (
+            (cls.me, cls.ann), (cls.me, cls.bob), (cls.ann, cls.me),
+            (cls.ann, cls.eve), (cls.bob, cls.eve), (cls.bob, cls.max),
+            (cls.ann, cls.kim), (cls.eve, cls.me),
+        ):
+            Follow.objects.create(user=user, author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_adjacency_is_sorted_and_cached(self):
+        """Подписки и подписчики читаются из базы один раз"""
+        with self.assertNumQueries(2):
+            following = follow_graph.following(self.me.pk)
+            followers = follow_graph.followers(self.me.pk)
+        self.assertEqual(list(following), sorted([self.ann.pk, self.bob.pk]))
+        self.assertEqual(list(followers), sorted([self.ann.pk, self.eve.pk]))
+        with self.assertNumQueries(0):
+            follow_graph.following(self.me.pk)
+            follow_graph.followers(self.me.pk)
+
+    def test_follow_changes_invalidate_graph(self):
+        """Подписка и отписка сразу видны в графе"""
+        follow_graph.following(self.me.pk)
+        follow_graph.followers(self.max.pk)
+        with run_on_commit():
+            follow_graph.follow(self.me, self.max)
+        self.assertTrue(follow_graph.is_following(self.me.pk, self.max.pk))
+        self.assertIn(self.me.pk, follow_graph.followers(self.max.pk))
+        with run_on_commit():
+            Follow.objects.filter(user=self.me, author=self.max).delete()
+        self.assertFalse(follow_graph.is_following(self.me.pk, self.max.pk))
+        self.assertNotIn(self.me.pk, follow_graph.followers(self.max.pk))
+
+    def test_bulk_check(self):
+        """Подписки на много авторов проверяются одним чтением"""
+        authors = [user.pk for user in self.users]
+        follow_graph.following(self.me.pk)
+        with self.assertNumQueries(0):
+            followed = follow_graph.follows(self.me.pk, authors)
+        self.assertEqual(followed, {self.ann.pk, self.bob.pk})
+        self.assertEqual(follow_graph.follows(None, authors), set())
+
+    def test_mutual(self):
+        """Взаимные подписки"""
+        self.assertEqual(follow_graph.mutual(self.me.pk), [self.ann.pk])
+
+    def test_suggestions(self):
+        """Рекомендуются авторы, которых читают подписки пользователя"""
+        self.assertEqual(
+            follow_graph.suggestions(self.me.pk),
+            [self.eve.pk, self.max.pk, self.kim.pk],
+        )
+        # Свои подписки и подписки всех источников — два запроса.
+        cache.clear()
+        with self.assertNumQueries(2):
+            follow_graph.suggestions(self.me.pk, limit=1)
+
+    def test_group_page_follow_buttons(self):
+        """У постов группы кнопки подписки по состоянию графа"""
+        group = Group.objects.create(title='Группа', slug='group')
+        for author in (self.ann, self.max, self.me):
+            Post.objects.create(author=author, text='Пост', group=group)
+        self.client.force_login(self.me)
+        response = self.client.get(
+            reverse('posts:group_list', args=(group.slug,))
+        )
+        self.assertContains(
+            response, reverse('posts:profile_unfollow', args=('user1',))
+        )
+        self.assertContains(
+            response, reverse('posts:profile_follow', args=('user4',))
+        )
+        self.assertNotContains(
+            response, reverse('posts:profile_follow', args=('user0',))
+        )
+
+
+class FollowActionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+        self.follow_url = reverse(
+            'posts:profile_follow', args=(self.author.username,)
+        )
+        self.unfollow_url = reverse(
+            'posts:profile_unfollow', args=(self.author.username,)
+        )
+
+    def followers_count(self):
+        return AuthorStats.objects.get(author=self.author).followers_count
+
+    def test_get_not_allowed(self):
+        """GET не подписывает и не отписывает"""
+        for url in (self.follow_url, self.unfollow_url):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_repeated_follow_is_idempotent(self):
+        """Повторная подписка не создаёт строку и не двигает счётчики"""
+        self.client.post(self.follow_url)
+        self.assertFalse(follow_graph.follow(self.reader, self.author))
+        self.client.post(self.follow_url)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(self.followers_count(), 1)
+
+    def test_repeated_unfollow_is_idempotent(self):
+        """Отписка без подписки ничего не ломает"""
+        self.client.post(self.follow_url)
+        self.client.post(self.unfollow_url)
+        response = self.client.post(self.unfollow_url)
+        self.assertRedirects(
+            response, reverse('posts:profile', args=(self.author.username,))
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.followers_count(), 0)
+
+    def test_repeated_unfollow_keeps_counter(self):
+        """Повторная отписка — один DELETE, счётчик не уходит ниже"""
+        other = User.objects.create(username='other')
+        follow_graph.follow(other, self.author)
+        self.client.post(self.follow_url)
+        self.assertEqual(self.followers_count(), 2)
+        self.assertTrue(follow_graph.unfollow(self.reader, self.author))
+        with CaptureQueriesContext(connection) as context:
+            self.assertFalse(follow_graph.unfollow(self.reader, self.author))
+        self.assertEqual(
+            [query['sql'].split()[0] for query in context.captured_queries
+             if 'posts_follow' in query['sql']],
+            ['DELETE'],
+        )
+        self.client.post(self.unfollow_url)
+        self.assertEqual(self.followers_count(), 1)
+        self.assertTrue(
+            Follow.objects.filter(user=other, author=self.author).exists()
+        )
+
+    def test_self_follow_ignored(self):
+        """На себя подписаться нельзя"""
+        self.client.post(
+            reverse('posts:profile_follow', args=(self.reader.username,))
+        )
+        self.assertFalse(Follow.objects.exists())
+
+    def test_ajax_returns_json(self):
+        """AJAX-запрос получает состояние подписки в JSON"""
+        response = self.client.post(
+            self.follow_url, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.json(), {
+            'following': True,
+            'followers_count': 1,
+            'url': self.unfollow_url,
+        })
+        response = self.client.post(
+            self.unfollow_url, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.json(), {
+            'following': False,
+            'followers_count': 0,
+            'url': self.follow_url,
+        })
+
+    def test_redirects_back(self):
+        """После подписки возвращает на страницу, но не на чужой сайт"""
+        index = reverse('posts:index')
+        response = self.client.post(self.follow_url, {'next': index})
+        self.assertRedirects(response, index)
+        response = self.client.post(
+            self.unfollow_url, {'next': 'https://example.com/'}
+        )
+        self.assertRedirects(
+            response, reverse('posts:profile', args=(self.author.username,))
+        )
+
+    def test_index_fragment_shared_between_users(self):
+        """Лента главной общая для всех, подписки приходят отдельно"""
+        Post.objects.create(author=self.author, text='Пост автора')
+        follow_graph.follow(self.reader, self.author)
+        other = Client()
+        other.force_login(User.objects.create(username='other'))
+        url = reverse('posts:index')
+        slot = 'posts/includes/follow_slot.html'
+        response = self.client.get(url)
+        self.assertIn(slot, [template.name for template in response.templates])
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+        self.assertEqual(response.context['follow_state'], {
+            'user': self.reader.pk, 'following': [self.author.pk],
+        })
+        response = other.get(url)
+        self.assertNotIn(
+            slot, [template.name for template in response.templates]
+        )
+        self.assertContains(response, f'data-author="{self.author.pk}"')
+        self.assertEqual(response.context['follow_state']['following'], [])
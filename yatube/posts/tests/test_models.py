@@ -1,5 +1,6 @@
+from django.db import IntegrityError, transaction
 from django.test import TestCase
-from posts.models import Group, Post, User
+from posts.models import Follow, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -23,3 +24,10 @@ class PostModelTest(TestCase):
 
         group = PostModelTest.group
         self.assertEqual(group.__str__(), group.title)
+
+    def test_follow_is_unique(self):
+        """Нельзя дважды подписаться на одного автора"""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=PostModelTest.user)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=reader, author=PostModelTest.user)
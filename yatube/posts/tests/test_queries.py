@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+from .utils import QueryBudgetMixin, run_on_commit
+
+POSTS_COUNT = 15
+
+
+class ViewQueriesTests(QueryBudgetMixin, TestCase):
+    """Число запросов страниц не зависит от числа постов и комментариев"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-group',
+            description='Тестовое описание',
+        )
+        cls.author = User.objects.create(username='Author')
+        for number in range(POSTS_COUNT):
+            author = User.objects.create(username=f'Author{number}')
+            Follow.objects.create(user=cls.reader, author=author)
+            cls.post = Post.objects.create(
+                author=author,
+                text='Тестовый текст',
+                group=cls.group,
+            )
+            Post.objects.create(
+                author=cls.author,
+                text='Тестовый текст',
+                group=cls.group,
+            )
+        for number in range(POSTS_COUNT):
+            commentator = User.objects.create(username=f'Commentator{number}')
+            Comment.objects.create(
+                post=cls.post,
+                author=commentator,
+                text='Тестовый комментарий',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.auth_client = Client()
+        self.auth_client.force_login(self.reader)
+
+    def test_public_pages_query_budget(self):
+        """Публичные страницы укладываются в бюджет запросов"""
+        budgets = {
+            reverse('posts:index'): 1,
+            reverse('posts:group_list', args=(self.group.slug,)): 2,
+            reverse('posts:profile', args=(self.author.username,)): 3,
+            reverse('posts:post_detail', args=(self.post.pk,)): 3,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                with self.assertMaxQueries(budget):
+                    self.client.get(url)
+
+    def test_follow_index_query_budget(self):
+        """Лента подписок укладывается в бюджет запросов"""
+        # Сессия и пользователь — два запроса, страница ленты по её
+        # индексу и посты страницы по ключам — ещё два, готовые
+        # рекомендации авторов — один.
+        with self.assertMaxQueries(5):
+            self.auth_client.get(reverse('posts:follow_index'))
+
+    def test_repeated_pages_served_from_cache(self):
+        """Повторный запрос группы и профиля берёт посты из кэша"""
+        budgets = {
+            reverse('posts:group_list', args=(self.group.slug,)): 1,
+            reverse('posts:profile', args=(self.author.username,)): 2,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.client.get(url)
+                with self.assertMaxQueries(budget):
+                    self.client.get(url)
+
+    def test_cached_index_fragment_skips_page_query(self):
+        """Попадание во фрагмент главной не читает посты страницы"""
+        url = reverse('posts:index')
+        self.auth_client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            self.auth_client.get(url)
+        self.assertFalse([
+            query['sql'] for query in context.captured_queries
+            if 'FROM "posts_post"' in query['sql']
+        ])
+
+    def test_cached_page_invalidated_by_new_post(self):
+        """Новый пост сразу появляется на закэшированной странице группы"""
+        url = reverse('posts:group_list', args=(self.group.slug,))
+        self.client.get(url)
+        with run_on_commit():
+            post = Post.objects.create(
+                author=self.author, text='Свежий пост', group=self.group
+            )
+        response = self.client.get(url)
+        self.assertEqual(response.context['page_obj'][0], post)
@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import recommendations
+from posts.models import AuthorRecommendation, Follow, Group, Post, User
+
+
+class RecommendationsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [
+            User.objects.create(username=f'user{number}')
+            for number in range(6)
+        ]
+        cls.me, cls.ann, cls.bob, cls.eve, cls.max, cls.kim = cls.users
+        for user, author in (
+            (cls.me, cls.ann), (cls.me, cls.bob), (cls.ann, cls.me),
+            (cls.ann, cls.eve), (cls.bob, cls.eve), (cls.bob, cls.max),
+            (cls.ann, cls.kim),
+        ):
+            Follow.objects.create(user=user, author=author)
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        for author, group in (
+            (cls.ann, cls.group), (cls.kim, cls.group),
+            (cls.max, cls.other_group), (cls.eve, None),
+        ):
+            Post.objects.create(author=author, group=group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_ranking(self):
+        """Авторов ранжируют общие подписки и общие группы"""
+        ranked = recommendations.recommend(
+            self.me.pk, recommendations.load_following(),
+            recommendations.load_author_groups(), top=10, group_weight=0.5,
+        )
+        self.assertEqual(ranked, [
+            (2, 2, 0, self.eve.pk),
+            (1.5, 1, 1, self.kim.pk),
+            (1, 1, 0, self.max.pk),
+        ])
+
+    def test_rebuild_replaces_rows(self):
+        """Пересчёт заменяет прежние рекомендации и режет их до top"""
+        AuthorRecommendation.objects.create(
+            user=self.me, author=self.bob, score=100, co_follows=100,
+            shared_groups=0,
+        )
+        out = StringIO()
+        call_command('recommend_authors', '--top', '2', stdout=out)
+        self.assertIn('Пользователей: 6', out.getvalue())
+        self.assertEqual(
+            list(self.me.recommendations.values_list('author', flat=True)),
+            [self.eve.pk, self.kim.pk],
+        )
+
+    def test_follow_drops_recommendation(self):
+        """Подписка убирает автора из рекомендаций"""
+        recommendations.rebuild()
+        Follow.objects.create(user=self.me, author=self.eve)
+        self.assertFalse(
+            self.me.recommendations.filter(author=self.eve).exists()
+        )
+
+    def test_follow_index_shows_recommendations(self):
+        """Лента подписок показывает рекомендации одним запросом"""
+        recommendations.rebuild()
+        client = Client()
+        client.force_login(self.me)
+        with self.assertNumQueries(1):
+            shown = recommendations.for_user(self.me.pk)
+            [item.author.username for item in shown]
+        response = client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Кого почитать')
+        self.assertContains(
+            response, reverse('posts:profile', args=(self.kim.username,))
+        )
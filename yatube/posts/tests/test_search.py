@@ -0,0 +1,86 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.fulltext import match_query
+from posts.models import Post, User
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.cats = Post.objects.create(
+            author=cls.author, text='Котики, котики и ещё раз Котики'
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.author, text='Собаки дружат с котиками'
+        )
+        Post.objects.create(author=cls.author, text='Про погоду')
+
+    def search(self, query, **params):
+        return self.client.get(reverse('posts:search'), {'q': query, **params})
+
+    def found(self, response):
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_ranked_prefix_search(self):
+        """Поиск по префиксу без учёта регистра, релевантное выше"""
+        response = self.search('КОТИК')
+        self.assertEqual(self.found(response), [self.cats.pk, self.dogs.pk])
+        self.assertEqual(self.found(self.search('котик собак')),
+                         [self.dogs.pk])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении поста"""
+        dogs = Post.objects.get(pk=self.dogs.pk)
+        dogs.text = 'Собаки дружат с попугаями'
+        dogs.save()
+        self.assertEqual(self.found(self.search('котик')), [self.cats.pk])
+        self.assertEqual(self.found(self.search('попуг')), [dogs.pk])
+        dogs.delete()
+        self.assertEqual(self.found(self.search('попуг')), [])
+
+    def test_highlight_is_escaped(self):
+        """Подсветка не пропускает HTML из текста поста"""
+        Post.objects.create(author=self.author, text='<b>Хомяки</b> тоже')
+        response = self.search('хомяки')
+        self.assertContains(response, '&lt;b&gt;<mark>Хомяки</mark>&lt;/b&gt;')
+
+    def test_operators_are_not_fts_syntax(self):
+        """Кавычки и операторы FTS5 в запросе не ломают поиск"""
+        self.assertIsNone(match_query('"*(-)'))
+        self.assertEqual(match_query('NEAR("кот" OR'), '"NEAR"* "кот"* "OR"*')
+        response = self.search('"котики" OR')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.found(self.search('"*')), [])
+
+    def test_cursor_pagination_keeps_query(self):
+        """Курсорные страницы выдачи сохраняют строку запроса"""
+        for number in range(12):
+            Post.objects.create(author=self.author, text=f'Котики {number}')
+        response = self.search('котики')
+        first = self.found(response)
+        paginator = response.context['page_obj'].paginator
+        self.assertContains(
+            response, '?q=%D0%BA%D0%BE%D1%82%D0%B8%D0%BA%D0%B8&amp;cursor='
+        )
+        second = self.found(
+            self.search('котики', cursor=paginator.next_cursor)
+        )
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(set(first + second)), 13)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт через полнотекстовый индекс"""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('admin:posts_post_changelist'), {'q': 'котик'}
+            )
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertTrue(any(
+            'MATCH' in query['sql'] for query in queries.captured_queries
+        ))
@@ -0,0 +1,54 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase
+from posts import stats
+from posts.models import AuthorStats, Comment, FeedEntry, Follow, Post, User
+
+
+class SeedYatubeTests(TestCase):
+    def test_seed_creates_consistent_data(self):
+        """seed_yatube создаёт данные, ленты и согласованные счётчики"""
+        call_command(
+            'seed_yatube', users=20, groups=3, posts=200, comments=50,
+            follows=40, seed=1, stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+        expected = sum(
+            Post.objects.filter(author=follow.author).count()
+            for follow in Follow.objects.select_related('author')
+        )
+        self.assertEqual(FeedEntry.objects.count(), expected)
+        seeded = {
+            row.author_id: row for row in AuthorStats.objects.all()
+        }
+        stats.recount(list(seeded))
+        for row in AuthorStats.objects.all():
+            self.assertEqual(
+                (row.posts_count, row.followers_count, row.comments_count),
+                (seeded[row.author_id].posts_count,
+                 seeded[row.author_id].followers_count,
+                 seeded[row.author_id].comments_count),
+            )
+
+    def test_bench_views_reports_every_page(self):
+        """bench_views измеряет все страницы лент"""
+        call_command(
+            'seed_yatube', users=10, groups=2, posts=30, comments=10,
+            follows=15, seed=2, stdout=StringIO(),
+        )
+        out = StringIO()
+        call_command('bench_views', requests=2, warmup=1, stdout=out)
+        rows = {
+            line.split()[0]: line.split()[1:]
+            for line in out.getvalue().splitlines()[1:]
+        }
+        for page in ('index', 'group_posts', 'profile', 'post_detail',
+                     'follow_index'):
+            self.assertIn(page, rows)
+        # Гостевые страницы меряются мимо кэша страниц целиком.
+        self.assertGreater(int(rows['profile'][-1]), 0)
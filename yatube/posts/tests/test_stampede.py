@@ -0,0 +1,75 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+from posts.models import Group, Post, User
+from posts.paginators import CursorPaginator
+
+CLIENTS = 8
+
+
+class StampedeTests(TransactionTestCase):
+    """Истёкшую ленту пересчитывает один запрос из многих"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='Author')
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test-group'
+        )
+        for _ in range(3):
+            Post.objects.create(
+                author=self.author, text='Тестовый текст', group=self.group
+            )
+
+    def fire(self, url):
+        """Одновременно отправляет запросы, считает чтения страницы."""
+        barrier = threading.Barrier(CLIENTS)
+        statuses = []
+        calls = []
+        page = CursorPaginator.page
+
+        def slow_page(paginator, cursor=None):
+            calls.append(cursor)
+            time.sleep(0.2)
+            return page(paginator, cursor)
+
+        def request():
+            try:
+                barrier.wait()
+                statuses.append(Client().get(url).status_code)
+            finally:
+                connections.close_all()
+
+        with mock.patch.object(CursorPaginator, 'page', slow_page):
+            threads = [
+                threading.Thread(target=request) for _ in range(CLIENTS)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(statuses, [200] * CLIENTS)
+        return len(calls)
+
+    def test_single_recomputation(self):
+        """Лента, группа и профиль читаются из базы один раз"""
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.fire(url), 1)
+
+    def test_expired_page_recomputed_once(self):
+        """После истечения записи её пересчитывает один запрос"""
+        url = reverse('posts:index')
+        self.fire(url)
+        with mock.patch('core.cache.time.time',
+                        return_value=time.time() + 3600):
+            self.assertEqual(self.fire(url), 1)
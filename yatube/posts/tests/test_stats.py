@@ -0,0 +1,132 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from posts.models import (AuthorStats, Comment, Follow, Group, GroupStats,
+                          Post, User)
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.reader = User.objects.create(username='Reader')
+
+    def stats(self, user):
+        return AuthorStats.objects.get(author=user)
+
+    def test_counters_follow_changes(self):
+        """Счётчики меняются вместе с постами, подписками и комментариями"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text='Ответ')
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.assertEqual(self.stats(self.reader).comments_count, 1)
+        follow.delete()
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 0)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+        self.assertEqual(self.stats(self.reader).comments_count, 0)
+
+    def test_recount_repairs_drift(self):
+        """Команда recount исправляет разошедшиеся счётчики"""
+        for number in range(3):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        AuthorStats.objects.filter(author=self.author).update(posts_count=42)
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(self.stats(self.author).posts_count, 3)
+
+    def test_profile_reads_counter(self):
+        """Профиль показывает число постов из статистики автора"""
+        Post.objects.create(author=self.author, text='Пост')
+        AuthorStats.objects.filter(author=self.author).update(posts_count=7)
+        response = self.client.get(f'/profile/{self.author.username}/')
+        self.assertEqual(response.context['posts_amount'], 7)
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+        cls.group = Group.objects.create(title='Первая', slug='first')
+        cls.other = Group.objects.create(title='Вторая', slug='second')
+
+    def setUp(self):
+        cache.clear()
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_stats_follow_posts(self):
+        """Число постов и последний пост меняются вместе с постами"""
+        first = Post.objects.create(
+            author=self.author, text='Первый', group=self.group
+        )
+        second = Post.objects.create(
+            author=self.author, text='Второй', group=self.group
+        )
+        self.assertEqual(self.stats(self.group).posts_count, 2)
+        self.assertEqual(self.stats(self.group).last_post, second)
+        second.delete()
+        self.assertEqual(self.stats(self.group).posts_count, 1)
+        self.assertEqual(self.stats(self.group).last_post, first)
+        self.assertEqual(
+            self.stats(self.group).last_pub_date, first.pub_date
+        )
+
+    def test_moved_post_updates_both_groups(self):
+        """Перенос поста в другую группу учитывается в обеих"""
+        post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group
+        )
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other
+        post.save()
+        self.assertEqual(self.stats(self.group).posts_count, 0)
+        self.assertIsNone(self.stats(self.group).last_post)
+        self.assertEqual(self.stats(self.other).posts_count, 1)
+        self.assertEqual(self.stats(self.other).last_post, post)
+        post.text = 'Правка'
+        post.save()
+        self.assertEqual(self.stats(self.other).posts_count, 1)
+
+    def test_recount_repairs_drift(self):
+        """Команда recount исправляет статистику групп"""
+        Post.objects.create(author=self.author, text='Пост', group=self.group)
+        GroupStats.objects.filter(group=self.group).update(
+            posts_count=42, last_post=None
+        )
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(self.stats(self.group).posts_count, 1)
+        self.assertIsNotNone(self.stats(self.group).last_post)
+
+    def test_group_index(self):
+        """Каталог групп показывает счётчики и превью без COUNT постов"""
+        Post.objects.create(
+            author=self.author, text='Превью поста', group=self.other
+        )
+        # Число групп для паджинатора и сама страница каталога.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('posts:group_index'))
+        self.assertEqual(
+            [item.group for item in response.context['page_obj']],
+            [self.other, self.group],
+        )
+        self.assertContains(response, 'Превью поста')
+        self.assertContains(response, 'Постов: 1')
+
+    def test_group_page_header(self):
+        """Страница группы берёт счётчик из статистики"""
+        Post.objects.create(author=self.author, text='Пост', group=self.group)
+        response = self.client.get(
+            reverse('posts:group_list', args=(self.group.slug,))
+        )
+        self.assertEqual(response.context['group_stats'].posts_count, 1)
+        self.assertContains(response, 'Постов: 1')
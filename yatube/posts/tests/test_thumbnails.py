@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts import thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='Author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            self.post = Post.objects.create(
+                author=self.author,
+                text='Пост с картинкой',
+                image=SimpleUploadedFile('small.gif', SMALL_GIF),
+            )
+        self.scheduled = schedule
+
+    def test_save_schedules_rendering(self):
+        """Сохранение поста с новой картинкой ставит миниатюры в очередь"""
+        self.scheduled.assert_called_once_with(self.post)
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            Post.objects.create(author=self.author, text='Без картинки')
+        schedule.assert_not_called()
+
+    def test_inline_without_workers(self):
+        """Без воркеров миниатюры делаются при фиксации транзакции"""
+        with mock.patch.object(
+            thumbnails.transaction, 'on_commit', lambda func: func()
+        ), mock.patch.object(thumbnails, 'generate') as generate, \
+                mock.patch.object(thumbnails, 'executor') as executor:
+            thumbnails.schedule(self.post)
+        generate.assert_called_once_with(
+            self.post.pk, self.post.image.name
+        )
+        executor.assert_not_called()
+
+    def test_placeholder_until_rendered(self):
+        """Пока миниатюры нет, страница показывает заглушку"""
+        with mock.patch.object(thumbnails, 'get_thumbnail') as resize:
+            response = self.client.get(reverse('posts:index'))
+        resize.assert_not_called()
+        self.assertContains(response, 'aspect-ratio: 960 / 339')
+        self.assertNotContains(response, '<img class="card-img')
+
+    def test_generate_stores_dimensions(self):
+        """Воркер сохраняет адрес и размеры и сбрасывает кэш карточки"""
+        self.client.get(reverse('posts:index'))
+        thumbnails.generate(self.post.pk, self.post.image.name)
+        self.post.refresh_from_db()
+        rendition = self.post.rendition('card')
+        self.assertEqual(
+            (rendition['width'], rendition['height']), (960, 339)
+        )
+        self.assertFalse(thumbnails.is_stale(self.post))
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, rendition['url'])
+        self.assertContains(response, 'width="960" height="339"')
+
+    def test_replaced_image_is_stale(self):
+        """Миниатюры старой картинки не показываются для новой"""
+        thumbnails.generate(self.post.pk, self.post.image.name)
+        self.post.refresh_from_db()
+        self.post.image = 'posts/other.gif'
+        self.assertIsNone(self.post.rendition('card'))
+        self.assertTrue(thumbnails.is_stale(self.post))
+
+    def test_backfill_command(self):
+        """generate_thumbnails строит только недостающие миниатюры"""
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('1', out.getvalue())
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('0', out.getvalue())
@@ -0,0 +1,106 @@
+import datetime
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from posts import trending
+from posts.models import (Comment, Follow, Group, Post, TrendingGroup,
+                          TrendingPost, User)
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(title='Тихая', slug='quiet')
+        cls.busy_group = Group.objects.create(title='Шумная', slug='busy')
+        cls.now = timezone.now()
+        cls.old = cls.create_post('Старый', hours=30, group=cls.busy_group)
+        cls.fresh = cls.create_post('Свежий', hours=1, group=cls.group)
+        cls.expired = cls.create_post(
+            'Вне окна', hours=settings.TRENDING_WINDOW // 3600 + 1
+        )
+
+    @classmethod
+    def create_post(cls, text, hours, group=None):
+        post = Post.objects.create(author=cls.author, text=text, group=group)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=cls.now - datetime.timedelta(hours=hours)
+        )
+        return post
+
+    def setUp(self):
+        cache.clear()
+
+    def ranked(self):
+        return list(TrendingPost.objects.values_list('post_id', flat=True))
+
+    def comment(self, post, count):
+        for number in range(count):
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Ответ {number}'
+            )
+
+    def test_score_decays_by_half_life(self):
+        """Вовлечённость поста уменьшается вдвое за период полураспада"""
+        half_life = datetime.timedelta(seconds=settings.TRENDING_HALF_LIFE)
+        self.assertAlmostEqual(
+            trending.post_score(self.now - 2 * half_life, 3, 0),
+            trending.post_score(self.now, 0, 0),
+        )
+
+    def test_full_rank(self):
+        """Без активности свежие посты выше, посты вне окна не попадают"""
+        self.assertEqual(trending.rank(now=self.now), (2, 2))
+        self.assertEqual(self.ranked(), [self.fresh.pk, self.old.pk])
+
+    def test_incremental_rank(self):
+        """Частичный пересчёт видит новые комментарии и подписчиков"""
+        trending.rank(now=self.now)
+        since = timezone.now()
+        self.comment(self.old, 15)
+        self.assertEqual(trending.rank(since=since), (1, 1))
+        self.assertEqual(self.ranked(), [self.old.pk, self.fresh.pk])
+        self.assertEqual(
+            TrendingPost.objects.get(post=self.old).comments_count, 15
+        )
+        since = timezone.now()
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(trending.rank(since=since)[0], 2)
+        self.assertEqual(
+            TrendingPost.objects.get(post=self.fresh).author_followers, 1
+        )
+
+    def test_groups_ranked(self):
+        """Группы ранжируются по сумме вкладов своих постов"""
+        self.comment(self.old, 15)
+        trending.rank(now=self.now)
+        self.assertEqual(
+            list(TrendingGroup.objects.values_list('group', flat=True)),
+            [self.busy_group.pk, self.group.pk],
+        )
+
+    def test_popular_page(self):
+        """Страница «Популярное» отдаёт посты в порядке рейтинга"""
+        self.comment(self.old, 15)
+        call_command('rank_trending', stdout=StringIO())
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.old.pk, self.fresh.pk],
+        )
+        self.assertContains(
+            response, reverse('posts:group_list', args=('busy',))
+        )
+
+    def test_popular_page_query_budget(self):
+        """Рейтинг читается одним запросом, группы — ещё одним"""
+        trending.rank(now=self.now)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('posts:popular'))
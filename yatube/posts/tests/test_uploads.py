@@ -0,0 +1,175 @@
+import os
+import shutil
+import tempfile
+import tracemalloc
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http.multipartparser import MultiPartParser
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+from PIL import Image
+from posts import uploads
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+# Потолок памяти на разбор загрузки: куски по 64 КБ плюс служебные буферы.
+UPLOAD_MEMORY_CEILING = 1024 * 1024
+
+
+def image_file(name='image.png', size=(2, 2), image_format='PNG', **params):
+    buffer = BytesIO()
+    Image.new('RGB', size, (255, 0, 0)).save(buffer, image_format, **params)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BoundedUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='Author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def create(self, image):
+        return self.client.post(
+            reverse('posts:post_create'), {'text': 'Пост', 'image': image}
+        )
+
+    def test_accepts_valid_image(self):
+        """Годная картинка проходит через потоковый обработчик"""
+        response = self.create(image_file())
+        self.assertRedirects(
+            response, reverse('posts:profile', args=(self.user,))
+        )
+        self.assertTrue(Post.objects.exclude(image='').exists())
+
+    @override_settings(POST_IMAGE_MAX_SIZE=1024)
+    def test_rejects_oversized_file(self):
+        """Слишком большой файл отбрасывается с ошибкой формы"""
+        big = SimpleUploadedFile('big.png', image_file().read() + b'0' * 4096)
+        response = self.create(big)
+        self.assertFormError(
+            response, 'form', 'image',
+            'Файл слишком большой: не больше 1,0\xa0КБ.',
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_rejects_too_many_pixels_by_header(self):
+        """Картинка с огромными размерами отсекается по заголовку"""
+        response = self.create(image_file(size=(20, 20)))
+        self.assertFormError(
+            response, 'form', 'image',
+            'Картинка 20×20 слишком велика: не больше 100 пикселей.',
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1500000)
+    def test_pixel_limit_in_megapixels(self):
+        """Предел от мегапикселя показывается в Мп с долями"""
+        self.assertEqual(
+            uploads.inspect_image(image_file(size=(2000, 1000))),
+            'Картинка 2000×1000 слишком велика: не больше 1,5 Мп.',
+        )
+
+    def test_rejects_unsupported_format(self):
+        """Форматы вне POST_IMAGE_FORMATS не принимаются"""
+        response = self.create(image_file('image.bmp', image_format='BMP'))
+        self.assertFormError(
+            response, 'form', 'image',
+            'Поддерживаются только картинки JPEG, PNG, GIF, WEBP.',
+        )
+        response = self.create(SimpleUploadedFile('fake.png', b'not image'))
+        self.assertFormError(
+            response, 'form', 'image',
+            'Загрузите картинку: файл повреждён или не является ею.',
+        )
+
+    def test_sanitize_strips_metadata(self):
+        """Воркер пересохраняет картинку без EXIF"""
+        exif = Image.Exif()
+        exif[0x010e] = 'Домашний адрес'
+        name = default_storage.save(
+            'posts/exif.jpg',
+            image_file('exif.jpg', image_format='JPEG', exif=exif.tobytes()),
+        )
+        with default_storage.open(name) as source:
+            self.assertIn('exif', Image.open(source).info)
+        clean_name = uploads.sanitize(name)
+        self.assertNotEqual(clean_name, name)
+        with default_storage.open(clean_name) as source:
+            self.assertNotIn('exif', Image.open(source).info)
+
+    def test_sanitize_keeps_icc_profile(self):
+        """Цветовой профиль JPEG переживает пересохранение"""
+        # Содержимое профиля Pillow не разбирает, хватит любых байтов.
+        profile = b'icc-profile' * 16
+        name = default_storage.save(
+            'posts/icc.jpg',
+            image_file('icc.jpg', image_format='JPEG', icc_profile=profile),
+        )
+        clean_name = uploads.sanitize(name)
+        self.assertNotEqual(clean_name, name)
+        with default_storage.open(clean_name) as source:
+            self.assertEqual(Image.open(source).info['icc_profile'], profile)
+
+    def test_sanitize_strips_gif_comment(self):
+        """Из GIF убирается комментарий, анимация остаётся"""
+        frames = [Image.new('P', (2, 2), color) for color in range(3)]
+        buffer = BytesIO()
+        frames[0].save(
+            buffer, 'GIF', save_all=True, append_images=frames[1:],
+            comment='Домашний адрес'.encode(), duration=100, loop=0,
+        )
+        name = default_storage.save(
+            'posts/comment.gif',
+            SimpleUploadedFile('comment.gif', buffer.getvalue()),
+        )
+        clean_name = uploads.sanitize(name)
+        self.assertNotEqual(clean_name, name)
+        with default_storage.open(clean_name) as source:
+            image = Image.open(source)
+            self.assertNotIn('comment', image.info)
+            self.assertEqual(image.n_frames, 3)
+            self.assertEqual(image.info['duration'], 100)
+
+    def test_streaming_memory_ceiling(self):
+        """Разбор загрузки в 3 МБ укладывается в потолок памяти"""
+        buffer = BytesIO()
+        Image.frombytes('RGB', (1000, 1000), os.urandom(3 * 10 ** 6)).save(
+            buffer, 'PNG', compress_level=0
+        )
+        body = encode_multipart(BOUNDARY, {
+            'text': 'Пост',
+            'image': SimpleUploadedFile('noise.png', buffer.getvalue()),
+        })
+        request = RequestFactory().post('/create/')
+        handler = uploads.BoundedUploadHandler(request)
+        parser = MultiPartParser(
+            {'CONTENT_TYPE': MULTIPART_CONTENT, 'CONTENT_LENGTH': len(body)},
+            BytesIO(body), [handler],
+        )
+        tracemalloc.start()
+        try:
+            _, files = parser.parse()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(files['image'].size, 3 * 10 ** 6)
+        self.assertEqual(request.upload_errors, {})
+        self.assertLess(
+            peak, UPLOAD_MEMORY_CEILING,
+            f'Пик памяти при загрузке {peak} байт',
+        )
+        files['image'].close()
@@ -8,6 +8,7 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from posts.models import Follow, Group, Post, User
+from posts.tests.utils import run_on_commit
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -65,6 +66,7 @@ class PostViewsTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.auth_client = Client()
         self.auth_client.force_login(self.user_ivan)
@@ -200,13 +202,38 @@ class PostViewsTests(TestCase):
             text='Кешируемый пост',
             author=self.user_ivan)
         added = self.auth_client.get(reverse('posts:index')).content
-        post.delete()
-        deleted = self.auth_client.get(reverse('posts:index')).content
-        self.assertEqual(added, deleted)
+        Post.objects.filter(pk=post.pk).update(text='Изменён в обход модели')
+        updated = self.auth_client.get(reverse('posts:index')).content
+        self.assertEqual(added, updated)
         cache.clear()
         cleaned = self.auth_client.get(reverse('posts:index')).content
         self.assertNotEqual(added, cleaned)
 
+    def test_cache_index_page_invalidated_on_change(self):
+        """Создание, изменение и удаление поста сразу видны на главной"""
+        self.auth_client.get(reverse('posts:index'))
+        with run_on_commit():
+            post = Post.objects.create(
+                text='Новый кешируемый пост',
+                author=self.user_ivan)
+        self.assertContains(self.auth_client.get(reverse('posts:index')),
+                            'Новый кешируемый пост')
+        post.text = 'Исправленный пост'
+        with run_on_commit():
+            post.save()
+        self.assertContains(self.auth_client.get(reverse('posts:index')),
+                            'Исправленный пост')
+        with run_on_commit():
+            post.delete()
+        self.assertNotContains(self.auth_client.get(reverse('posts:index')),
+                               'Исправленный пост')
+
+    def test_cache_index_page_varies_by_auth(self):
+        """Переключатель лент не попадает в кэш для гостей"""
+        self.auth_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response, reverse('posts:follow_index'))
+
     def test_follow_index(self):
         """При создании нового поста он отображается в ленте подписчиков автора
         и не отражается в лентах пользователей, на него не подисанных"""
@@ -245,6 +272,7 @@ class PaginatorViewsTest(TestCase):
             )
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
 
     def test_first_index_page_contains_ten_records(self):
@@ -288,3 +316,51 @@ class PaginatorViewsTest(TestCase):
                                    args=(PaginatorViewsTest.user_petr.username,
                                          )) + '?page=2')
         self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_index_cursor_pages_walk_whole_feed(self):
+        """Курсорная паджинация index проходит ленту без повторов"""
+        response = self.client.get(reverse('posts:index'))
+        first_page = response.context['page_obj']
+        self.assertFalse(first_page.has_previous())
+        url = reverse('posts:index') + '?cursor={}'
+        response = self.client.get(
+            url.format(first_page.paginator.next_cursor)
+        )
+        second_page = response.context['page_obj']
+        response = self.client.get(
+            url.format(second_page.paginator.next_cursor)
+        )
+        third_page = response.context['page_obj']
+        self.assertEqual(len(third_page), 4)
+        self.assertFalse(third_page.has_next())
+        seen = [post.pk for page in (first_page, second_page, third_page)
+                for post in page]
+        self.assertEqual(seen, list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'pk', flat=True)
+        ))
+
+    def test_index_cursor_previous_page(self):
+        """Ссылка «Предыдущая» возвращает ту же страницу"""
+        url = reverse('posts:index')
+        first_page = self.client.get(url).context['page_obj']
+        second_page = self.client.get(
+            url + f'?cursor={first_page.paginator.next_cursor}'
+        ).context['page_obj']
+        back_page = self.client.get(
+            url + f'?cursor={second_page.paginator.previous_cursor}'
+        ).context['page_obj']
+        self.assertEqual(list(back_page), list(first_page))
+        self.assertFalse(back_page.has_previous())
+
+    def test_cache_index_page_varies_by_page(self):
+        """Разные страницы index кэшируются под разными ключами"""
+        first = self.client.get(reverse('posts:index')).content
+        second = self.client.get(reverse('posts:index') + '?page=2').content
+        self.assertNotEqual(first, second)
+
+    def test_invalid_cursor_shows_first_page(self):
+        """Испорченный курсор открывает первую страницу"""
+        response = self.client.get(reverse('posts:index') + '?cursor=broken')
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertFalse(response.context['page_obj'].has_previous())
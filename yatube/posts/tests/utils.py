@@ -0,0 +1,40 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Проверка того, что код укладывается в бюджет SQL-запросов."""
+
+    @contextmanager
+    def assertMaxQueries(self, limit):
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context)
+        if executed > limit:
+            queries = '\n'.join(
+                f'{number}. {query["sql"]}'
+                for number, query in enumerate(context.captured_queries, 1)
+            )
+            self.fail(
+                f'Выполнено {executed} SQL-запросов при бюджете {limit}:\n'
+                f'{queries}'
+            )
+
+
+@contextmanager
+def run_on_commit():
+    """Выполняет колбэки ``on_commit``, зарегистрированные внутри блока.
+
+    TestCase не фиксирует транзакцию, и без этого они не сработали бы
+    вовсе; то же делает ``captureOnCommitCallbacks`` из Django 3.2.
+    """
+    start = len(connection.run_on_commit)
+    try:
+        yield
+    finally:
+        callbacks = connection.run_on_commit[start:]
+        del connection.run_on_commit[start:]
+        for _, callback in callbacks:
+            callback()
@@ -0,0 +1,105 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from . import cache, uploads
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def placeholder(name):
+    """Размеры заглушки для миниатюры, которую ещё не сделали."""
+    geometry, _ = settings.THUMBNAIL_RENDITIONS[name]
+    width, height = (int(size) for size in geometry.split('x'))
+    return {'url': None, 'width': width, 'height': height}
+
+
+def render(image_name):
+    """Строит все настроенные миниатюры картинки."""
+    renditions = {'source': image_name}
+    for name, (geometry, options) in settings.THUMBNAIL_RENDITIONS.items():
+        thumbnail = get_thumbnail(image_name, geometry, **options)
+        renditions[name] = {
+            'url': thumbnail.url,
+            'width': thumbnail.width,
+            'height': thumbnail.height,
+        }
+    return renditions
+
+
+def generate(post_id, image_name, sanitize=True):
+    """Сохраняет миниатюры поста, если картинку не успели заменить.
+
+    С ``sanitize`` картинка сперва пересохраняется без метаданных, и пост
+    переключается на очищенный файл.
+    """
+    try:
+        clean_name = (
+            uploads.sanitize(image_name) if sanitize else image_name
+        )
+        renditions = render(clean_name)
+        updated = Post.objects.filter(pk=post_id, image=image_name).update(
+            image=clean_name,
+            thumbnails=json.dumps(renditions),
+            updated=timezone.now(),
+        )
+        if updated:
+            cache.invalidate_post(post_id)
+            cache.purge_profile_pages(*Post.objects.filter(
+                pk=post_id).values_list('author__username', flat=True))
+        if clean_name != image_name:
+            obsolete = clean_name if not updated else image_name
+            if not Post.objects.filter(image=obsolete).exists():
+                default_storage.delete(obsolete)
+    except Exception:
+        logger.exception('Не удалось сделать миниатюры поста %s', post_id)
+
+
+def _work(post_id, image_name):
+    try:
+        generate(post_id, image_name)
+    finally:
+        connections.close_all()
+
+
+def is_stale(post):
+    """Есть ли у поста картинка без готовых миниатюр."""
+    if not post.image:
+        return False
+    return post.renditions().get('source') != post.image.name
+
+
+def schedule(post):
+    """Отдаёт картинку поста воркерам после фиксации транзакции.
+
+    При ``THUMBNAIL_WORKERS = 0`` миниатюры делаются в том же потоке.
+    """
+    post_id, image_name = post.pk, post.image.name
+    if not settings.THUMBNAIL_WORKERS:
+        transaction.on_commit(lambda: generate(post_id, image_name))
+        return
+    transaction.on_commit(
+        lambda: executor().submit(_work, post_id, image_name)
+    )
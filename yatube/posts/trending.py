@@ -0,0 +1,131 @@
+import datetime
+import math
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from core import cache as shared_cache
+
+from .models import Comment, Group, Post, TrendingGroup, TrendingPost
+
+BATCH_SIZE = 500
+
+
+def post_score(pub_date, comments, followers):
+    """Оценка поста для «Популярного».
+
+    Вовлечённость — комментарии плюс ``TRENDING_FOLLOWER_WEIGHT`` за
+    каждого подписчика автора — затухает вдвое за
+    ``TRENDING_HALF_LIFE`` секунд. Хранится её логарифм, сдвинутый на
+    время публикации: так посты упорядочены так же, как по затухающей
+    вовлечённости, но оценку не надо пересчитывать с ходом времени.
+    """
+    engagement = comments + settings.TRENDING_FOLLOWER_WEIGHT * followers
+    return math.log2(1 + engagement) \
+        + pub_date.timestamp() / settings.TRENDING_HALF_LIFE
+
+
+def group_score(scores):
+    """Оценка группы: логарифм суммы затухающих вкладов её постов."""
+    top = max(scores)
+    return top + math.log2(sum(2 ** (score - top) for score in scores))
+
+
+def _batches(ids):
+    ids = sorted(ids)
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def changed_posts(since, cutoff):
+    """Посты окна, чья оценка могла измениться с момента ``since``."""
+    recent = Post.objects.filter(pub_date__gte=cutoff)
+    if since is None:
+        return set(recent.values_list('pk', flat=True))
+    changed = set(recent.filter(updated__gte=since).values_list(
+        'pk', flat=True))
+    changed.update(Comment.objects.filter(
+        created__gte=since, post__pub_date__gte=cutoff,
+    ).values_list('post_id', flat=True))
+    # У подписок нет времени создания: изменившихся авторов выдаёт
+    # расхождение со снимком числа подписчиков.
+    changed.update(TrendingPost.objects.exclude(
+        author_followers=F('post__author__stats__followers_count')
+    ).values_list('post_id', flat=True))
+    return changed
+
+
+def _rank_posts(post_ids):
+    """Пересчитывает оценки постов; возвращает затронутые группы."""
+    rows = Post.objects.filter(pk__in=post_ids).values_list(
+        'pk', 'pub_date', 'group_id', 'author__stats__followers_count')
+    comments = dict(Comment.objects.filter(post_id__in=post_ids).order_by(
+    ).values('post').annotate(total=Count('pk')).values_list(
+        'post', 'total'))
+    entries = [
+        TrendingPost(
+            post_id=pk, group_id=group_id, pub_date=pub_date,
+            score=post_score(pub_date, comments.get(pk, 0), followers or 0),
+            comments_count=comments.get(pk, 0),
+            author_followers=followers or 0,
+        )
+        for pk, pub_date, group_id, followers in rows
+    ]
+    stale = TrendingPost.objects.filter(post_id__in=post_ids)
+    groups = set(stale.values_list('group_id', flat=True))
+    groups.update(entry.group_id for entry in entries)
+    with transaction.atomic():
+        stale.delete()
+        TrendingPost.objects.bulk_create(entries)
+    return groups
+
+
+def _rank_groups(group_ids):
+    scores = {}
+    for group_id, score in TrendingPost.objects.filter(
+        group_id__in=group_ids
+    ).values_list('group_id', 'score'):
+        scores.setdefault(group_id, []).append(score)
+    with transaction.atomic():
+        TrendingGroup.objects.filter(group_id__in=group_ids).delete()
+        TrendingGroup.objects.bulk_create(
+            TrendingGroup(
+                group_id=group_id, score=group_score(values),
+                posts_count=len(values),
+            )
+            for group_id, values in scores.items()
+        )
+
+
+def rank(since=None, now=None):
+    """Обновляет таблицы «Популярного».
+
+    Без ``since`` пересчитываются все посты окна ``TRENDING_WINDOW``,
+    с ним — только изменившиеся после этого момента. Посты, выпавшие из
+    окна, удаляются. Возвращает число пересчитанных постов и групп.
+    """
+    if now is None:
+        now = timezone.now()
+    cutoff = now - datetime.timedelta(seconds=settings.TRENDING_WINDOW)
+    expired = TrendingPost.objects.filter(pub_date__lt=cutoff)
+    groups = set(expired.values_list('group_id', flat=True))
+    expired.delete()
+    post_ids = changed_posts(since, cutoff)
+    for batch in _batches(post_ids):
+        groups |= _rank_posts(batch)
+    if since is None:
+        groups |= set(Group.objects.values_list('pk', flat=True))
+    groups.discard(None)
+    for batch in _batches(groups):
+        _rank_groups(batch)
+    if post_ids or groups:
+        shared_cache.purge_pages('posts:popular')
+    return len(post_ids), len(groups)
+
+
+def popular_groups(limit=None):
+    if limit is None:
+        limit = settings.TRENDING_GROUPS_SHOWN
+    return list(TrendingGroup.objects.select_related('group')[:limit])
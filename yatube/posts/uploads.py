@@ -0,0 +1,146 @@
+import warnings
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import (SkipFile,
+                                             TemporaryFileUploadHandler)
+from django.template.defaultfilters import filesizeformat, floatformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, ImageOps
+
+# Что остаётся от image.info после пересохранения: цветовой профиль,
+# прозрачность и параметры анимации GIF.
+KEPT_INFO = ('icc_profile', 'transparency', 'duration', 'loop', 'background')
+# Параметры пересохранения без метаданных; GIF сохраняется со всеми
+# кадрами, чтобы не потерять анимацию.
+REENCODE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 85},
+    'GIF': {'save_all': True},
+}
+
+
+def pixels_label(pixels):
+    """Предел пикселей для сообщений: «24 Мп», «1,5 Мп», «100 пикселей»."""
+    if pixels < 10 ** 6:
+        return f'{pixels} пикселей'
+    return f'{floatformat(pixels / 10 ** 6, -1)} Мп'
+
+
+def inspect_image(file):
+    """Проверяет формат и размеры по заголовку, не раскодируя картинку."""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            image = Image.open(file)
+            image_format, (width, height) = image.format, image.size
+    except (OSError, SyntaxError, ValueError,
+            Image.DecompressionBombError, Image.DecompressionBombWarning):
+        return 'Загрузите картинку: файл повреждён или не является ею.'
+    if image_format not in settings.POST_IMAGE_FORMATS:
+        return ('Поддерживаются только картинки '
+                f'{", ".join(settings.POST_IMAGE_FORMATS)}.')
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        return (f'Картинка {width}×{height} слишком велика: не больше '
+                f'{pixels_label(settings.POST_IMAGE_MAX_PIXELS)}.')
+    return None
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку на диск по частям и отбрасывает негодные файлы.
+
+    Файл больше ``POST_IMAGE_MAX_SIZE`` перестаёт приниматься на первом
+    лишнем куске, остальные проверяются по заголовку картинки. Причины
+    отказа складываются в ``request.upload_errors`` по имени поля.
+    """
+
+    def __init__(self, request):
+        super().__init__(request)
+        self.received = 0
+        request.upload_errors = {}
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.received = 0
+        if (self.content_length or 0) > settings.POST_IMAGE_MAX_SIZE:
+            self.reject(self.too_large())
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_SIZE:
+            self.reject(self.too_large())
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        error = inspect_image(uploaded)
+        if error:
+            uploaded.close()
+            self.request.upload_errors[self.field_name] = error
+            return None
+        uploaded.seek(0)
+        return uploaded
+
+    def too_large(self):
+        return ('Файл слишком большой: не больше '
+                f'{filesizeformat(settings.POST_IMAGE_MAX_SIZE)}.')
+
+    def reject(self, error):
+        self.request.upload_errors[self.field_name] = error
+        raise SkipFile()
+
+
+def bounded_uploads(view):
+    """Подключает BoundedUploadHandler к представлению с формой.
+
+    Обработчики загрузки можно заменить только до чтения POST, а его
+    читает CsrfViewMiddleware, поэтому проверка CSRF переносится внутрь.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [BoundedUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+
+    return wrapper
+
+
+def is_valid(request, form):
+    """Валидирует форму вместе с отказами обработчика загрузки."""
+    valid = form.is_valid()
+    for field, error in getattr(request, 'upload_errors', {}).items():
+        form.add_error(field, error)
+        valid = False
+    return valid
+
+
+def sanitize(image_name):
+    """Пересохраняет картинку без EXIF, комментариев и прочих метаданных.
+
+    Поворот из EXIF применяется к пикселям, цветовой профиль сохраняется.
+    Возвращает имя нового файла или прежнее, если формат не пересохраняется.
+    """
+    with default_storage.open(image_name) as source:
+        image = Image.open(source)
+        image_format = image.format
+        if image_format not in REENCODE_OPTIONS:
+            return image_name
+        if image_format != 'GIF':
+            image = ImageOps.exif_transpose(image)
+        image.info = {
+            key: value for key, value in image.info.items()
+            if key in KEPT_INFO
+        }
+        options = dict(REENCODE_OPTIONS[image_format])
+        # JPEG и WEBP берут профиль только из параметров сохранения.
+        if 'icc_profile' in image.info:
+            options['icc_profile'] = image.info['icc_profile']
+        buffer = BytesIO()
+        image.save(buffer, image_format, **options)
+    return default_storage.save(image_name, ContentFile(buffer.getvalue()))
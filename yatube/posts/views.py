@@ -1,90 +1,182 @@
+from urllib.parse import urlencode
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import F
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import is_safe_url
+from django.views.decorators.http import condition, require_POST
 
+from . import (cache, comment_queue, conditional, feeds, follow_graph,
+               fulltext, stats, trending, uploads)
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import Group, GroupStats, Post, TrendingPost, User
+from .paginators import COMMENT_ORDERINGS, CursorPaginator
+
 
+def following_context(request, page_obj):
+    """Подписки на авторов страницы для кнопок «Подписаться»."""
+    if not request.user.is_authenticated:
+        return {'following_ids': set()}
+    return {
+        'following_ids': follow_graph.follows(
+            request.user.pk, {post.author_id for post in page_obj}
+        ),
+    }
 
+
+@condition(etag_func=conditional.index_etag)
 def index(request):
     template = 'posts/index.html'
     title = 'Последние обновления на сайте'
-    posts = Post.objects.order_by('-pub_date')
-    paginator = Paginator(posts, settings.POSTS_AMOUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = Post.objects.for_feed()
+    # Посты и курсоры страницы берутся из общего кэша лент ещё до шаблона,
+    # поэтому при попадании в него запрос постов не выполняется.
+    page_obj = cache.feed_page(request, 'index', posts)
+    following = following_context(request, page_obj)
 
     context = {
         'posts': posts,
         'title': title,
         'page_obj': page_obj,
         'index': True,
+        # Фрагмент ленты общий для всех, кнопки подписки в нём
+        # настраивает follow.js по этим данным.
+        'follow_state': {
+            'user': request.user.pk,
+            'following': sorted(following['following_ids']),
+        },
+        **cache.feed_cache_context(),
+        **following,
     }
 
     return render(request, template, context)
 
 
+def popular(request):
+    paginator = CursorPaginator(
+        TrendingPost.objects.select_related('post__author', 'post__group'),
+        settings.POSTS_AMOUNT, ordering=('-score', '-post_id'),
+    )
+    page_obj = paginator.page(request.GET.get('cursor'))
+    # Курсоры уже посчитаны по строкам рейтинга, дальше нужны посты.
+    page_obj.object_list = [entry.post for entry in page_obj]
+    context = {
+        'title': 'Популярное',
+        'page_obj': page_obj,
+        'popular': True,
+        'groups': trending.popular_groups(),
+        **cache.feed_cache_context(),
+        **following_context(request, page_obj),
+    }
+    return render(request, 'posts/popular.html', context)
+
+
+def group_index(request):
+    groups = GroupStats.objects.select_related(
+        'group', 'last_post__author'
+    ).order_by(F('last_pub_date').desc(nulls_last=True), 'group_id')
+    paginator = Paginator(groups, settings.GROUPS_AMOUNT)
+    context = {
+        'title': 'Группы',
+        'page_obj': paginator.get_page(request.GET.get('page')),
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+@condition(etag_func=conditional.group_etag)
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.order_by('-pub_date')
-    paginator = Paginator(posts, settings.POSTS_AMOUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = get_object_or_404(
+        Group.objects.select_related('stats'), slug=slug
+    )
+    group_stats = stats.for_group(group)
+    posts = group.posts.for_feed()
+    page_obj = cache.feed_page(
+        request, f'group:{group.pk}', posts, count=group_stats.posts_count,
+    )
 
     context = {
         'group': group,
+        'group_stats': group_stats,
         'page_obj': page_obj,
         'title': group.title,
-        'description': group.description
+        'description': group.description,
+        **following_context(request, page_obj),
     }
     return render(request, template, context)
 
 
+@condition(etag_func=conditional.profile_etag)
 def profile(request, username):
     template = 'posts/profile.html'
     author = get_object_or_404(User, username=username)
-    posts = author.posts.order_by('-pub_date')
-    post_amount = posts.count()
-    paginator = Paginator(posts, settings.POSTS_AMOUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    following = (request.user.is_authenticated
-                 and author.following.filter(user=request.user).exists())
+    author_stats = stats.for_author(author)
+    posts = author.posts.for_feed()
+    page_obj = cache.feed_page(
+        request, f'profile:{author.pk}', posts,
+        count=author_stats.posts_count,
+    )
+    following = follow_graph.is_following(request.user.pk, author.pk)
     context = {
         'page_obj': page_obj,
         'username': username,
-        'posts_amount': post_amount,
+        'posts_amount': author_stats.posts_count,
+        'followers_amount': author_stats.followers_count,
         'author': author,
         'following': following,
+        'following_ids': {author.pk} if following else set(),
     }
     return render(request, template, context)
 
 
+@condition(etag_func=conditional.post_etag)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    author_posts_amount = post.author.posts.order_by('-pub_date').count()
+    post = get_object_or_404(Post.objects.for_feed(), pk=post_id)
+    author_stats = stats.for_author(post.author)
     form = CommentForm()
+    order = request.GET.get('order')
+    if order not in COMMENT_ORDERINGS:
+        order = 'oldest'
+    cursor = request.GET.get('cursor', '')
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_AMOUNT,
+        ordering=COMMENT_ORDERINGS[order],
+    )
     context = {
         'post': post,
-        'posts_amount': author_posts_amount,
+        'posts_amount': author_stats.posts_count,
         'username': request.user,
         'form': form,
-        'comments': post.comments.all(),
+        # Страница читается из базы, только если фрагмент не в кэше.
+        'comments': SimpleLazyObject(lambda: paginator.page(cursor)),
+        'comments_order': order,
+        'comments_cursor': cursor,
+        'comments_version': cache.comments_version(post.pk),
+        'comments_cache_timeout': settings.COMMENTS_CACHE_TIMEOUT,
+        'pending_comments': comment_queue.pending_for(request, post.pk),
+        'cursor_query': f'order={order}&',
     }
     return render(request, template, context)
 
 
+@uploads.bounded_uploads
 @login_required
+@transaction.atomic
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(
         request.POST or None,
         files=request.FILES or None
     )
-    if form.is_valid():
+    if uploads.is_valid(request, form):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
@@ -96,6 +188,7 @@ def post_create(request):
     return render(request, template, context)
 
 
+@uploads.bounded_uploads
 @login_required
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
@@ -108,7 +201,7 @@ def post_edit(request, post_id):
         files=request.FILES or None,
         instance=post
     )
-    if form.is_valid():
+    if uploads.is_valid(request, form):
         form.save()
         return redirect('posts:post_detail', post_id)
 
@@ -122,47 +215,99 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    if settings.COMMENT_QUEUE_ENABLED:
+        return add_comment_queued(request, post_id)
+    with transaction.atomic():
+        post = get_object_or_404(Post, pk=post_id)
+        form = CommentForm(request.POST or None)
+        if form.is_valid():
+            comment = form.save(commit=False)
+            comment.author = request.user
+            comment.post = post
+            comment.save()
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+def add_comment_queued(request, post_id):
+    """Ставит комментарий в очередь вместо записи в базу.
+
+    Проверяется только, что пост существует; автор видит свой комментарий
+    сразу благодаря cookie с ещё не записанными комментариями.
+    """
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    response = redirect('posts:post_detail', post_id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
-    return redirect('posts:post_detail', post_id=post_id)
+        entry = comment_queue.enqueue(
+            post_id, request.user.pk, form.cleaned_data['text']
+        )
+        comment_queue.remember(request, response, entry)
+    return response
 
 
 @login_required
+@condition(etag_func=conditional.follow_etag)
 def follow_index(request):
     title = 'Последние обновления избранных авторов'
-    user = get_object_or_404(User, username=request.user)
-    following_authors = Follow.objects.filter(user=user).values('author')
-    posts = Post.objects.filter(author__in=following_authors)
-    paginator = Paginator(posts, settings.POSTS_AMOUNT)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = feeds.feed_page(request, request.user)
     context = {
         'title': title,
         'page_obj': page_obj,
         'follow': True,
+        # В ленте подписок все авторы уже в подписках.
+        'following_ids': {post.author_id for post in page_obj},
+        **cache.feed_cache_context(),
     }
     return render(request, 'posts/follow.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = CursorPaginator(
+        fulltext.search(query), settings.POSTS_AMOUNT,
+        ordering=('rank', 'id'),
+    )
+    context = {
+        'query': query,
+        'page_obj': paginator.page(request.GET.get('cursor')),
+        'cursor_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def follow_response(request, author, following):
+    """Ответ на подписку: JSON для AJAX, иначе возврат на страницу."""
+    if request.is_ajax():
+        view = 'posts:profile_unfollow' if following \
+            else 'posts:profile_follow'
+        return JsonResponse({
+            'following': following,
+            'followers_count': stats.for_author(author).followers_count,
+            # Куда отправлять форму в следующий раз.
+            'url': reverse(view, args=(author.username,)),
+        })
+    next_url = request.POST.get('next')
+    if next_url and is_safe_url(
+        next_url, allowed_hosts={request.get_host()},
+        require_https=request.is_secure(),
+    ):
+        return redirect(next_url)
+    return redirect('posts:profile', author.username)
+
+
 @login_required
+@require_POST
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
-    return redirect('posts:profile', author)
+    if request.user == author:
+        return follow_response(request, author, False)
+    follow_graph.follow(request.user, author)
+    return follow_response(request, author, True)
 
 
 @login_required
+@require_POST
 def profile_unfollow(request, username):
-    user_follower = get_object_or_404(
-        Follow,
-        user=request.user,
-        author__username=username
-    )
-    user_follower.delete()
-    return redirect('posts:profile', username)
+    author = get_object_or_404(User, username=username)
+    follow_graph.unfollow(request.user, author)
+    return follow_response(request, author, False)
@@ -0,0 +1,84 @@
+// Подписка без перезагрузки страницы: форма уходит fetch-запросом,
+// сервер отвечает JSON, а кнопка и счётчик подписчиков меняются на месте.
+function csrfToken() {
+  var match = document.cookie.match(/(?:^|;\s*)csrftoken=([^;]+)/);
+  return match ? decodeURIComponent(match[1]) : '';
+}
+
+function setField(form, name, value) {
+  var field = form.querySelector('input[name="' + name + '"]');
+  if (!field) {
+    field = document.createElement('input');
+    field.type = 'hidden';
+    field.name = name;
+    form.appendChild(field);
+  }
+  if (!field.value) {
+    field.value = value;
+  }
+}
+
+function showFollowing(form, following) {
+  var button = form.querySelector('button');
+  button.textContent = following ? 'Отписаться' : 'Подписаться';
+  button.classList.toggle('btn-light', following);
+  button.classList.toggle('btn-primary', !following);
+}
+
+// Кнопки из общего для всех фрагмента приходят без состояния: его
+// страница передаёт отдельно в follow-state.
+document.addEventListener('DOMContentLoaded', function () {
+  var state = document.getElementById('follow-state');
+  if (!state) {
+    return;
+  }
+  state = JSON.parse(state.textContent);
+  document.querySelectorAll('.follow-form[data-author]').forEach(
+    function (form) {
+      var author = Number(form.dataset.author);
+      if (author === state.user) {
+        form.remove();
+        return;
+      }
+      var following = state.following.indexOf(author) !== -1;
+      form.action = following ? form.dataset.unfollowUrl
+        : form.dataset.followUrl;
+      showFollowing(form, following);
+      form.hidden = false;
+    }
+  );
+});
+
+document.addEventListener('submit', function (event) {
+  var form = event.target;
+  if (!form.classList.contains('follow-form')) {
+    return;
+  }
+  event.preventDefault();
+  setField(form, 'csrfmiddlewaretoken', csrfToken());
+  setField(form, 'next', location.pathname + location.search);
+  var button = form.querySelector('button');
+  button.disabled = true;
+  fetch(form.action, {
+    method: 'POST',
+    body: new FormData(form),
+    credentials: 'same-origin',
+    headers: {'X-Requested-With': 'XMLHttpRequest'}
+  }).then(function (response) {
+    if (!response.ok) {
+      throw new Error(response.status);
+    }
+    return response.json();
+  }).then(function (data) {
+    form.action = data.url;
+    showFollowing(form, data.following);
+    var counter = document.querySelector('[data-followers-count]');
+    if (counter) {
+      counter.textContent = data.followers_count;
+    }
+  }).catch(function () {
+    form.submit();
+  }).finally(function () {
+    button.disabled = false;
+  });
+});
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -19,6 +20,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'about.apps.AboutConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -29,20 +31,25 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates/')
+# Бэкенды шаблонов и кэша из core.metrics учитывают время рендера и
+# попадания в кэш в метриках запроса.
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.TimedTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -60,13 +67,64 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Профиль SQLite для боевой нагрузки: WAL, прагмы из SQLITE_PRAGMAS
+# (их применяет core.signals) и постоянные соединения. Отключается
+# YATUBE_SQLITE_TUNING=0, например для сравнения в bench_sqlite.
+SQLITE_TUNING = os.environ.get('YATUBE_SQLITE_TUNING', '1') == '1'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+} if SQLITE_TUNING else {}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': os.environ.get(
+            'YATUBE_DB', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        'CONN_MAX_AGE': 60 if SQLITE_TUNING else 0,
     }
 }
 
+# Реплики только для чтения: пути к копиям базы через запятую,
+# например YATUBE_REPLICAS=/srv/yatube/replica1.sqlite3. В тестах
+# реплики смотрят на основную базу.
+READ_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.environ.get('YATUBE_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    READ_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+REPLICA_VIEWS = (
+    'posts:index',
+    'posts:popular',
+    'posts:group_index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+    'api:index',
+    'api:group_list',
+    'api:profile',
+    'api:post_detail',
+    'api:follow_index',
+)
+# Приложения, чьи модели читаются с реплик; сессии и пользователи
+# читаются с основной базы.
+REPLICA_APPS = ('posts',)
+REPLICA_PIN_COOKIE = 'db_pin'
+REPLICA_PIN_SECONDS = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -105,10 +163,108 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Кэш общий для всех процессов — файловый. locmem у каждого процесса
+# свой, он остаётся по умолчанию только для отладки и тестов.
+CACHE_BACKENDS = {
+    'file': {
+        'BACKEND': 'core.metrics.CountedFileBasedCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_DIR',
+            os.path.join(tempfile.gettempdir(), 'yatube-cache'),
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'locmem': {
+        'BACKEND': 'core.metrics.CountedLocMemCache',
+    },
+}
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': CACHE_BACKENDS[
+        os.environ.get('YATUBE_CACHE', 'locmem' if DEBUG else 'file')
+    ],
 }
+# Страницы, которые гости получают целиком из кэша, и cookie, с которыми
+# запрос идёт мимо него: сессия, ещё не записанные комментарии,
+# закрепление за основной базой.
+PAGE_CACHE_TIMEOUT = 60
+PAGE_CACHE_VIEWS = (
+    'posts:index',
+    'posts:popular',
+    'posts:group_index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'about:author',
+    'about:tech',
+)
+PAGE_CACHE_BYPASS_COOKIES = (
+    'sessionid', 'pending_comments', REPLICA_PIN_COOKIE,
+)
+
+# Сколько ждать чужого пересчёта записи и сколько ещё отдавать
+# устаревшее значение, пока её пересчитывают (core.cache).
+CACHE_LOCK_TIMEOUT = 10
+CACHE_STALE_GRACE = 60
+# Файлы блокировок пересчёта при файловом кэше.
+CACHE_LOCK_DIR = os.environ.get(
+    'YATUBE_CACHE_LOCK_DIR',
+    os.path.join(tempfile.gettempdir(), 'yatube-cache-locks'),
+)
 
 POSTS_AMOUNT = 10
+COMMENTS_AMOUNT = 20
+GROUPS_AMOUNT = 20
+
+FEED_BATCH_SIZE = 500
+
+FEED_CACHE_TIMEOUT = 60 * 5
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+COMMENTS_CACHE_TIMEOUT = 60 * 60
+FOLLOW_GRAPH_CACHE_TIMEOUT = 60 * 60
+# Сколько авторов рекомендовать и сколько подписок пользователя
+# просматривать для этого.
+FOLLOW_SUGGESTIONS = 5
+FOLLOW_SUGGESTION_SOURCES = 50
+# Рекомендации авторов, которые считает recommend_authors: сколько
+# хранить на пользователя, сколько показывать и вес общей группы
+# относительно одного общего читателя.
+RECOMMENDATIONS_TOP = 20
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_GROUP_WEIGHT = 0.5
+
+# «Популярное»: какие посты ранжировать, за сколько секунд вклад поста
+# уменьшается вдвое, сколько стоит один подписчик автора относительно
+# комментария и как часто rank_trending --loop обновляет рейтинг.
+TRENDING_WINDOW = 60 * 60 * 24 * 7
+TRENDING_HALF_LIFE = 60 * 60 * 12
+TRENDING_FOLLOWER_WEIGHT = 0.1
+TRENDING_INTERVAL = 60
+TRENDING_GROUPS_SHOWN = 5
+
+REQUEST_METRICS_DIR = os.path.join(tempfile.gettempdir(), 'yatube-metrics')
+# Тесты пишут метрики во временный каталог, а не в каталог сайта.
+TEST_RUNNER = 'core.test_runner.TestRunner'
+# Окно гистограмм в минутах и период сброса в файл в секундах.
+REQUEST_METRICS_WINDOW = 15
+REQUEST_METRICS_FLUSH_INTERVAL = 10
+
+# Миниатюры картинок постов: имя -> (геометрия, параметры sorl-thumbnail)
+# и число фоновых воркеров; 0 — делать миниатюры в потоке запроса.
+THUMBNAIL_RENDITIONS = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+THUMBNAIL_WORKERS = 2
+
+# Ограничения загружаемых картинок постов.
+POST_IMAGE_MAX_SIZE = 5 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 24 * 10 ** 6
+POST_IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+# Отложенная запись комментариев: очередь на диске и фоновый писатель;
+# без писателя очередь разбирает только команда flush_comments.
+COMMENT_QUEUE_ENABLED = False
+COMMENT_QUEUE_WRITER = True
+COMMENT_QUEUE_DIR = os.path.join(BASE_DIR, 'comment_queue')
+COMMENT_QUEUE_BATCH_SIZE = 500
+COMMENT_QUEUE_FLUSH_INTERVAL = 1
+COMMENT_QUEUE_PENDING_AGE = 60 * 10